@@ -2,11 +2,15 @@
 Agent API endpoints.
 """
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
+from fastapi_cache.decorator import cache
 
+from app.core.cache import AGENTS_CACHE_NAMESPACE, invalidate_cache
+from app.core.config import settings
 from app.core.database import get_async_db
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, next_cursor
 from app.repositories.agent import (
     AgentRepository,
     AgentExecutionRepository,
@@ -20,6 +24,7 @@ from app.services.agent import (
 )
 from app.schemas.agent import (
     Agent,
+    AgentListAdapter,
     AgentCreate,
     AgentUpdate,
     AgentWithDetails,
@@ -27,6 +32,7 @@ from app.schemas.agent import (
     AgentExecutionRequest,
     AgentExecutionResponse,
     AgentMemory,
+    AgentMemoryListAdapter,
     AgentMemoryCreate,
     AgentMemoryUpdate,
 )
@@ -34,70 +40,83 @@ from app.schemas.agent import (
 router = APIRouter()
 
 
-def get_agent_service(db: AsyncSession = Depends(get_async_db)) -> AgentService:
-    """Get agent service with all repositories."""
+class ServiceBundle:
+    """Agent services sharing one database session."""
+    
+    __slots__ = ("agent", "execution", "memory")
+    
+    def __init__(
+        self,
+        agent: AgentService,
+        execution: AgentExecutionService,
+        memory: AgentMemoryService,
+    ):
+        self.agent = agent
+        self.execution = execution
+        self.memory = memory
+
+
+async def get_services(db: AsyncSession = Depends(get_async_db)) -> ServiceBundle:
+    """Get agent, execution and memory services in a single dependency."""
     agent_repo = AgentRepository(db)
     execution_repo = AgentExecutionRepository(db)
     dependency_repo = AgentDependencyRepository(db)
     memory_repo = AgentMemoryRepository(db)
     
-    service = AgentService(agent_repo)
-    service.set_repositories(execution_repo, dependency_repo, memory_repo)
-    return service
-
-
-def get_execution_service(db: AsyncSession = Depends(get_async_db)) -> AgentExecutionService:
-    """Get execution service."""
-    execution_repo = AgentExecutionRepository(db)
-    return AgentExecutionService(execution_repo)
-
-
-def get_memory_service(db: AsyncSession = Depends(get_async_db)) -> AgentMemoryService:
-    """Get memory service."""
-    memory_repo = AgentMemoryRepository(db)
-    return AgentMemoryService(memory_repo)
+    agent_service = AgentService(agent_repo)
+    agent_service.set_repositories(execution_repo, dependency_repo, memory_repo)
+    return ServiceBundle(
+        agent=agent_service,
+        execution=AgentExecutionService(execution_repo),
+        memory=AgentMemoryService(memory_repo),
+    )
 
 
 @router.get("/", response_model=List[Agent])
+@cache(expire=settings.CACHE_EXPIRE_SECONDS, namespace=AGENTS_CACHE_NAMESPACE)
 async def get_agents(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     agent_type: Optional[str] = None,
     active_only: bool = Query(False),
-    service: AgentService = Depends(get_agent_service),
+    services: ServiceBundle = Depends(get_services),
 ):
     """Get all agents."""
     if agent_type:
-        return await service.get_by_type(agent_type)
+        agents = await services.agent.get_by_type(agent_type)
     elif active_only:
-        return await service.get_active_agents()
+        agents = await services.agent.get_active_agents()
     else:
-        return await service.get_multi(skip, limit)
+        agents = await services.agent.get_multi(skip, limit)
+    return AgentListAdapter.validate_python(agents)
 
 
 @router.get("/{agent_id}", response_model=AgentWithDetails)
+@cache(expire=settings.CACHE_EXPIRE_SECONDS, namespace=AGENTS_CACHE_NAMESPACE)
 async def get_agent(
     agent_id: UUID,
-    service: AgentService = Depends(get_agent_service),
+    services: ServiceBundle = Depends(get_services),
 ):
     """Get agent by ID."""
-    agent = await service.get(agent_id)
+    agent = await services.agent.get_with_details(agent_id)
     if not agent:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Agent not found"
         )
-    return agent
+    return AgentWithDetails.model_validate(agent)
 
 
 @router.post("/", response_model=Agent, status_code=status.HTTP_201_CREATED)
 async def create_agent(
     agent_in: AgentCreate,
-    service: AgentService = Depends(get_agent_service),
+    services: ServiceBundle = Depends(get_services),
 ):
     """Create new agent."""
     try:
-        return await service.create(agent_in)
+        agent = await services.agent.create(agent_in)
+        await invalidate_cache(AGENTS_CACHE_NAMESPACE)
+        return agent
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -109,16 +128,17 @@ async def create_agent(
 async def update_agent(
     agent_id: UUID,
     agent_in: AgentUpdate,
-    service: AgentService = Depends(get_agent_service),
+    services: ServiceBundle = Depends(get_services),
 ):
     """Update agent."""
     try:
-        agent = await service.update(agent_id, agent_in)
+        agent = await services.agent.update(agent_id, agent_in)
         if not agent:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Agent not found"
             )
+        await invalidate_cache(AGENTS_CACHE_NAMESPACE)
         return agent
     except ValueError as e:
         raise HTTPException(
@@ -130,40 +150,43 @@ async def update_agent(
 @router.delete("/{agent_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_agent(
     agent_id: UUID,
-    service: AgentService = Depends(get_agent_service),
+    services: ServiceBundle = Depends(get_services),
 ):
     """Delete agent."""
-    success = await service.delete(agent_id)
+    success = await services.agent.delete(agent_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Agent not found"
         )
+    await invalidate_cache(AGENTS_CACHE_NAMESPACE)
 
 
 @router.patch("/{agent_id}/status", response_model=Agent)
 async def update_agent_status(
     agent_id: UUID,
     status: str,
-    service: AgentService = Depends(get_agent_service),
+    services: ServiceBundle = Depends(get_services),
 ):
     """Update agent status."""
-    agent = await service.update_status(agent_id, status)
+    agent = await services.agent.update_status(agent_id, status)
     if not agent:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Agent not found"
         )
+    await invalidate_cache(AGENTS_CACHE_NAMESPACE)
     return agent
 
 
 @router.get("/{agent_id}/dependencies")
+@cache(expire=settings.CACHE_EXPIRE_SECONDS, namespace=AGENTS_CACHE_NAMESPACE)
 async def get_agent_dependencies(
     agent_id: UUID,
-    service: AgentService = Depends(get_agent_service),
+    services: ServiceBundle = Depends(get_services),
 ):
     """Get agent dependencies."""
-    dependencies = await service.get_dependencies(agent_id)
+    dependencies = await services.agent.get_dependencies(agent_id)
     return {"dependencies": dependencies}
 
 
@@ -172,16 +195,17 @@ async def add_agent_dependency(
     agent_id: UUID,
     depends_on_agent_id: UUID,
     dependency_type: str = "required",
-    service: AgentService = Depends(get_agent_service),
+    services: ServiceBundle = Depends(get_services),
 ):
     """Add dependency to agent."""
     try:
-        success = await service.add_dependency(agent_id, depends_on_agent_id, dependency_type)
+        success = await services.agent.add_dependency(agent_id, depends_on_agent_id, dependency_type)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Dependency already exists"
             )
+        await invalidate_cache(AGENTS_CACHE_NAMESPACE)
         return {"message": "Dependency added successfully"}
     except ValueError as e:
         raise HTTPException(
@@ -194,15 +218,16 @@ async def add_agent_dependency(
 async def remove_agent_dependency(
     agent_id: UUID,
     depends_on_agent_id: UUID,
-    service: AgentService = Depends(get_agent_service),
+    services: ServiceBundle = Depends(get_services),
 ):
     """Remove dependency from agent."""
-    success = await service.remove_dependency(agent_id, depends_on_agent_id)
+    success = await services.agent.remove_dependency(agent_id, depends_on_agent_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Dependency not found"
         )
+    await invalidate_cache(AGENTS_CACHE_NAMESPACE)
     return {"message": "Dependency removed successfully"}
 
 
@@ -210,14 +235,16 @@ async def remove_agent_dependency(
 async def execute_agent(
     agent_id: UUID,
     request: AgentExecutionRequest,
-    execution_service: AgentExecutionService = Depends(get_execution_service),
+    services: ServiceBundle = Depends(get_services),
 ):
     """Execute an agent."""
     # Override agent_id from URL
     request.agent_id = agent_id
     
     try:
-        return await execution_service.execute_agent(request)
+        response = await services.execution.execute_agent(request)
+        await invalidate_cache(AGENTS_CACHE_NAMESPACE)
+        return response
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -228,43 +255,64 @@ async def execute_agent(
 @router.get("/{agent_id}/executions", response_model=List[AgentExecution])
 async def get_agent_executions(
     agent_id: UUID,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    execution_service: AgentExecutionService = Depends(get_execution_service),
+    cursor: Optional[str] = None,
+    services: ServiceBundle = Depends(get_services),
 ):
-    """Get agent execution history."""
-    return await execution_service.get_by_agent(agent_id, skip, limit)
+    """Get agent execution history; pass the X-Next-Cursor header back as cursor for the next page."""
+    try:
+        position = decode_cursor(cursor, UUID) if cursor else None
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    executions = await services.execution.get_by_agent(agent_id, skip, limit, position)
+    next_page = next_cursor(executions, limit)
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    return executions
 
 
 @router.get("/{agent_id}/memory", response_model=List[AgentMemory])
+@cache(expire=settings.CACHE_EXPIRE_SECONDS, namespace=AGENTS_CACHE_NAMESPACE)
 async def get_agent_memory(
     agent_id: UUID,
-    memory_service: AgentMemoryService = Depends(get_memory_service),
+    keys: Optional[List[str]] = Query(None),
+    services: ServiceBundle = Depends(get_services),
 ):
-    """Get agent memory."""
-    return await memory_service.get_by_agent(agent_id)
+    """Get agent memory, optionally restricted to the given keys."""
+    if keys:
+        memories = (await services.memory.get_by_keys(agent_id, keys)).values()
+    else:
+        memories = await services.memory.get_by_agent(agent_id)
+    return AgentMemoryListAdapter.validate_python(list(memories))
 
 
 @router.post("/{agent_id}/memory", response_model=AgentMemory)
 async def set_agent_memory(
     agent_id: UUID,
     memory_in: AgentMemoryCreate,
-    memory_service: AgentMemoryService = Depends(get_memory_service),
+    services: ServiceBundle = Depends(get_services),
 ):
     """Set agent memory."""
     # Override agent_id from URL
     memory_in.agent_id = agent_id
-    return await memory_service.create(memory_in)
+    memory = await services.memory.upsert(memory_in)
+    await invalidate_cache(AGENTS_CACHE_NAMESPACE)
+    return memory
 
 
 @router.get("/{agent_id}/memory/{memory_key}")
 async def get_agent_memory_by_key(
     agent_id: UUID,
     memory_key: str,
-    memory_service: AgentMemoryService = Depends(get_memory_service),
+    services: ServiceBundle = Depends(get_services),
 ):
     """Get specific memory by key."""
-    memory = await memory_service.get_by_key(agent_id, memory_key)
+    memory = await services.memory.get_by_key(agent_id, memory_key)
     if not memory:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -279,10 +327,11 @@ async def update_agent_memory(
     memory_key: str,
     memory_value: dict,
     memory_type: str = "episodic",
-    memory_service: AgentMemoryService = Depends(get_memory_service),
+    services: ServiceBundle = Depends(get_services),
 ):
     """Update agent memory."""
-    memory = await memory_service.set_memory(agent_id, memory_key, memory_value, memory_type)
+    memory = await services.memory.set_memory(agent_id, memory_key, memory_value, memory_type)
+    await invalidate_cache(AGENTS_CACHE_NAMESPACE)
     return memory
 
 
@@ -290,21 +339,15 @@ async def update_agent_memory(
 async def delete_agent_memory(
     agent_id: UUID,
     memory_key: str,
-    memory_service: AgentMemoryService = Depends(get_memory_service),
+    services: ServiceBundle = Depends(get_services),
 ):
     """Delete agent memory."""
-    memory = await memory_service.get_by_key(agent_id, memory_key)
-    if not memory:
+    success = await services.memory.delete_by_key(agent_id, memory_key)
+    if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Memory not found"
         )
     
-    success = await memory_service.delete(memory.id)
-    if not success:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to delete memory"
-        )
-    
+    await invalidate_cache(AGENTS_CACHE_NAMESPACE)
     return {"message": "Memory deleted successfully"}
@@ -1,61 +1,98 @@
 """
 Chat API endpoints.
 """
-from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, Depends
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
 import uuid, random
-import json
+import msgspec
+import orjson
+import weakref
 
 from app.schemas.chat import ChatRequest, ChatResponse, WebSocketChatRequest
 from app.schemas.customer_session import CustomerSession
+from app.schemas._fast import CustomerSessionFast
 from app.services.chat import ChatService
 from app.repositories.chat import ChatRepository
-from app.core.database import get_async_db
+from app.core.database import db_ctx, get_async_db
 from app.core.logging import logger
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, next_cursor
 
 router = APIRouter()
 
-connections = {}
+# Validators built once at import instead of per message
+_CHAT_RESPONSE_ADAPTER = TypeAdapter(ChatResponse)
+_WS_REQUEST_ADAPTER = TypeAdapter(WebSocketChatRequest)
 
-def get_chat_service(db = Depends(get_async_db)) -> ChatService:
+# Session responses skip Pydantic and are encoded straight from msgspec structs;
+# response_model is kept for the OpenAPI schema
+_SESSION_ENCODER = msgspec.json.Encoder()
+
+# Per-socket conversation state; entries die with their WebSocket
+connections: "weakref.WeakKeyDictionary[WebSocket, dict]" = weakref.WeakKeyDictionary()
+
+async def get_chat_service(request: Request, db: AsyncSession = Depends(get_async_db)) -> ChatService:
     """Get ChatService with repository dependency."""
     chat_repository = ChatRepository(db)
-    return ChatService(chat_repository=chat_repository)
+    return ChatService(chat_repository=chat_repository, openai_client=request.app.state.openai_client)
 
-async def get_chat_service_async() -> ChatService:
+@asynccontextmanager
+async def get_chat_service_async(websocket: WebSocket) -> AsyncIterator[ChatService]:
     """Get ChatService with repository for async contexts (like WebSocket)."""
-    async for db in get_async_db():
+    async with db_ctx() as db:
         chat_repository = ChatRepository(db)
-        return ChatService(chat_repository=chat_repository)
+        yield ChatService(chat_repository=chat_repository, openai_client=websocket.app.state.openai_client)
 
 @router.post("/chat", response_model=ChatResponse)
-def chat_with_bot(request: ChatRequest, chat_service: ChatService = Depends(get_chat_service)):
+async def chat_with_bot(request: ChatRequest, chat_service: ChatService = Depends(get_chat_service)):
     """
     Process a customer message through the LangGraph workflow.
     """
     try:
-        result = chat_service.process_message(
+        thread_id = request.thread_id or chat_service.new_thread_id()
+        result = await chat_service.process_customer_message(
             message=request.message,
-            thread_id=request.thread_id,
-            customer_id=request.customer_id
+            thread_id=thread_id,
+            customer_id=request.customer_id,
+            is_initial=request.is_initial
         )
-        return ChatResponse(**result)
+        return _CHAT_RESPONSE_ADAPTER.validate_python(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing message: {str(e)}")
 
 @router.get("/sessions", response_model=List[CustomerSession])
 async def get_all_sessions(
     customer_id: str = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
     chat_service: ChatService = Depends(get_chat_service)
 ):
     """
     Get customer sessions with optional filtering by customer_id and pagination.
+    Pass the X-Next-Cursor response header back as cursor for the next page.
     """
+    try:
+        position = decode_cursor(cursor, int) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
         sessions = await chat_service.get_all_sessions(
             customer_id=customer_id,
+            limit=limit,
+            cursor=position,
+        )
+        sessions = sessions or []
+        headers = {}
+        next_page = next_cursor(sessions, limit)
+        if next_page:
+            headers[NEXT_CURSOR_HEADER] = next_page
+        return Response(
+            content=_SESSION_ENCODER.encode([CustomerSessionFast.from_row(session) for session in sessions]),
+            media_type="application/json",
+            headers=headers,
         )
-        return sessions
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching sessions: {str(e)}")
 
@@ -71,82 +108,85 @@ async def get_session_by_id(
         session = await chat_service.get_session_by_id(session_id)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
-        return session
+        return Response(
+            content=_SESSION_ENCODER.encode(CustomerSessionFast.from_row(session)),
+            media_type="application/json",
+        )
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching session: {str(e)}")
 
+async def send_ws_json(websocket: WebSocket, data: dict) -> None:
+    """Send a JSON text frame encoded with orjson."""
+    await websocket.send_text(orjson.dumps(data).decode())
+
 @router.websocket("/ws/chat")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()    
-    chat_service = await get_chat_service_async()
+    async with get_chat_service_async(websocket) as chat_service:
     
-    initial_thread_id = chat_service.create_openai_thread()
-    connections[websocket] = {
-        "thread_id": initial_thread_id, 
-    }
+        initial_thread_id = chat_service.new_thread_id()
+        connections[websocket] = {
+            "thread_id": initial_thread_id, 
+        }
 
-    error_message = {
-        "status": "error",
-        "message": "Let us fix the issue. Please try after some time.",
-    }
+        error_message = {
+            "status": "error",
+            "message": "Let us fix the issue. Please try after some time.",
+        }
 
-    try:
-        while True:
-            # Receive message from frontend
-            raw_data = await websocket.receive_text()
+        try:
+            while True:
+                # Receive message from frontend, as text or binary frame
+                frame = await websocket.receive()
+                if frame["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(frame.get("code", 1000))
+                raw_data = frame.get("bytes") or frame.get("text") or ""
             
-            try:
-                # Parse as JSON into native python object
-                data = json.loads(raw_data)
-                
-                # Validate the structure + if initial set initial thread id
-                if isinstance(data, dict) and "message" in data and "customer_id" in data:
-                    message = data["message"]
-                    thread_id = data.get("thread_id", initial_thread_id)
-                    customer_id = data.get("customer_id")
-                    is_initial = data.get("is_initial", False)
+                try:
+                    # Parse and validate the structure in one pass + if initial set initial thread id
+                    chat_request = _WS_REQUEST_ADAPTER.validate_json(raw_data)
+                    message = chat_request.message
+                    thread_id = chat_request.thread_id or initial_thread_id
+                    customer_id = chat_request.customer_id
+                    is_initial = chat_request.is_initial
                     
                     # Update connection info 
                     connections[websocket]["thread_id"] = thread_id
                     connections[websocket]["customer_id"] = customer_id
-                        
-                else:
-                    await websocket.send_json(error_message)
-                    await websocket.close(code=1000, reason="Conversation Error")
                     
-            except json.JSONDecodeError:
+                except ValidationError:
 
-                await websocket.send_json(error_message)
-                await websocket.close(code=1000, reason="Conversation Error")
+                    await send_ws_json(websocket, error_message)
+                    await websocket.close(code=1000, reason="Conversation Error")
+                    return
            
-            # Process with ChatService
-            result = await chat_service.process_customer_message(
-                message=message,
-                thread_id=thread_id,
-                customer_id=customer_id,
-                is_initial=is_initial
-            )    
-            await websocket.send_json(result)    
+                # Process with ChatService
+                result = await chat_service.process_customer_message(
+                    message=message,
+                    thread_id=thread_id,
+                    customer_id=customer_id,
+                    is_initial=is_initial
+                )    
+                await send_ws_json(websocket, result)    
             
-            # Check if conversation is complete
-            if result.get("is_complete", False):
-                completion_message = {
-                    "status": "complete",
-                    "message": "Conversation completed successfully! Connection will be closed.",
-                    "data": result["extracted_data"],
-                    "thread_id": thread_id,
-                    "customer_id": customer_id
-                }
-                await websocket.send_json(completion_message)                
-                await websocket.close(code=1000, reason="Conversation completed")
-                break  
-
-    except WebSocketDisconnect:
-        if websocket in connections:
-            del connections[websocket]
-    except Exception as e:
-        logger.error(f"WebSocket error: {e}")
-        if websocket in connections:
-            del connections[websocket]
\ No newline at end of file
+                # Check if conversation is complete
+                if result.get("is_complete", False):
+                    completion_message = {
+                        "status": "complete",
+                        "message": "Conversation completed successfully! Connection will be closed.",
+                        "data": result["extracted_data"],
+                        "thread_id": thread_id,
+                        "customer_id": customer_id
+                    }
+                    await send_ws_json(websocket, completion_message)                
+                    await websocket.close(code=1000, reason="Conversation completed")
+                    break  
+
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            logger.error(f"WebSocket error: {e}")
+        finally:
+            connections.pop(websocket, None)
\ No newline at end of file
@@ -1,8 +1,8 @@
 """
 Base classes for the AI Agents platform.
 """
-from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, TypeVar, Generic
+from typing import Any, Dict, List, Optional, Protocol, TypeVar, Generic
+from sqlalchemy import select, update, delete, bindparam
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
@@ -24,115 +24,126 @@ class BaseModelMixin(Base):
     id = None  # Will be defined in subclasses
     created_at = None
     updated_at = None
-    
-    def __init_subclass__(cls, **kwargs):
-        super().__init_subclass__(**kwargs)
-        # Add common fields to subclasses
-        if not hasattr(cls, 'id'):
-            cls.id = None  # Will be properly defined in subclasses
-        if not hasattr(cls, 'created_at'):
-            cls.created_at = None
-        if not hasattr(cls, 'updated_at'):
-            cls.updated_at = None
 
 
-class BaseRepository(ABC, Generic[T]):
+class BaseRepository(Generic[T]):
     """Base repository class for database operations."""
     
+    __slots__ = ("db",)
+    model: type
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Build the primary-key statements once per model; ids are bound at execute time
+        model = cls.__dict__.get("model")
+        if model is not None:
+            cls._get_stmt = select(model).where(model.id == bindparam("id"))
+            cls._delete_stmt = delete(model).where(model.id == bindparam("id")).returning(model.id)
+    
     def __init__(self, db: AsyncSession):
         self.db = db
     
-    @abstractmethod
     async def get(self, id: Any) -> Optional[T]:
         """Get entity by ID."""
-        pass
+        result = await self.db.execute(self._get_stmt, {"id": id})
+        return result.scalar_one_or_none()
     
-    @abstractmethod
     async def get_multi(self, skip: int = 0, limit: int = 100) -> List[T]:
-        """Get multiple entities."""
-        pass
+        """Get multiple entities, newest first."""
+        result = await self.db.execute(
+            select(self.model)
+            .offset(skip)
+            .limit(limit)
+            .order_by(self.model.created_at.desc())
+        )
+        return result.scalars().all()
     
-    @abstractmethod
     async def create(self, obj_in: CreateSchemaType) -> T:
         """Create new entity."""
-        pass
+        db_obj = self.model(**obj_in.model_dump())
+        self.db.add(db_obj)
+        # Server defaults come back through INSERT ... RETURNING, so no refresh is needed
+        await self.db.commit()
+        return db_obj
     
-    @abstractmethod
     async def update(self, id: Any, obj_in: UpdateSchemaType) -> Optional[T]:
-        """Update entity."""
-        pass
+        """Update entity with the fields set on obj_in."""
+        update_data = obj_in.model_dump(exclude_unset=True)
+        if not update_data:
+            return await self.get(id)
+        result = await self.db.execute(
+            update(self.model)
+            .where(self.model.id == id)
+            .values(**update_data)
+            .returning(self.model)
+        )
+        updated = result.scalar_one_or_none()
+        await self.db.commit()
+        return updated
     
-    @abstractmethod
     async def delete(self, id: Any) -> bool:
-        """Delete entity."""
-        pass
+        """Delete entity; False if no row had that ID."""
+        result = await self.db.execute(self._delete_stmt, {"id": id})
+        deleted = result.first()
+        await self.db.commit()
+        return deleted is not None
 
 
-class BaseService(ABC, Generic[T]):
-    """Base service class for business logic."""
+class BaseService(Protocol[T]):
+    """Interface for business-logic services."""
     
     def __init__(self, repository: BaseRepository[T]):
         self.repository = repository
     
-    @abstractmethod
     async def get(self, id: Any) -> Optional[T]:
         """Get entity by ID."""
-        pass
+        ...
     
-    @abstractmethod
     async def get_multi(self, skip: int = 0, limit: int = 100) -> List[T]:
         """Get multiple entities."""
-        pass
+        ...
     
-    @abstractmethod
     async def create(self, obj_in: CreateSchemaType) -> T:
         """Create new entity."""
-        pass
+        ...
     
-    @abstractmethod
     async def update(self, id: Any, obj_in: UpdateSchemaType) -> Optional[T]:
         """Update entity."""
-        pass
+        ...
     
-    @abstractmethod
     async def delete(self, id: Any) -> bool:
         """Delete entity."""
-        pass
+        ...
 
 
-class BaseController(ABC):
-    """Base controller class for API endpoints."""
+class BaseController(Protocol):
+    """Interface for API endpoint controllers."""
     
     def __init__(self, service: BaseService):
         self.service = service
     
-    @abstractmethod
     async def get(self, id: Any) -> Any:
         """Get entity endpoint."""
-        pass
+        ...
     
-    @abstractmethod
     async def get_multi(self, skip: int = 0, limit: int = 100) -> Any:
         """Get multiple entities endpoint."""
-        pass
+        ...
     
-    @abstractmethod
     async def create(self, obj_in: Any) -> Any:
         """Create entity endpoint."""
-        pass
+        ...
     
-    @abstractmethod
     async def update(self, id: Any, obj_in: Any) -> Any:
         """Update entity endpoint."""
-        pass
+        ...
     
-    @abstractmethod
     async def delete(self, id: Any) -> Any:
         """Delete entity endpoint."""
-        pass
+        ...
 
 
-class AgentBase(ABC):
+class AgentBase(Protocol):
     """Base class for AI agents."""
     
     def __init__(self, agent_id: str, name: str, description: str = ""):
@@ -144,15 +155,13 @@ class AgentBase(ABC):
         self.dependencies: List[str] = []
         self.memory: Dict[str, Any] = {}
     
-    @abstractmethod
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Execute the agent's main functionality."""
-        pass
+        ...
     
-    @abstractmethod
     async def validate_input(self, input_data: Dict[str, Any]) -> bool:
         """Validate input data."""
-        pass
+        ...
     
     async def get_status(self) -> Dict[str, Any]:
         """Get agent status."""
@@ -0,0 +1,49 @@
+"""
+Response caching for read-heavy endpoints.
+"""
+from typing import Any, Callable, Optional
+
+from fastapi import Request, Response
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from redis import asyncio as aioredis
+
+from app.core.config import settings
+from app.core.logging import logger
+
+AGENTS_CACHE_NAMESPACE = "agents"
+
+
+def request_key_builder(
+    func: Callable[..., Any],
+    namespace: str = "",
+    *,
+    request: Optional[Request] = None,
+    response: Optional[Response] = None,
+    args: tuple = (),
+    kwargs: Optional[dict] = None,
+) -> str:
+    """Build a cache key from the request path and query, ignoring injected dependencies."""
+    if request is None:
+        return f"{namespace}:{func.__module__}:{func.__name__}"
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"{namespace}:{func.__name__}:{request.url.path}?{query}"
+
+
+def init_cache() -> aioredis.Redis:
+    """Initialize the Redis cache backend and return its client."""
+    redis = aioredis.from_url(settings.REDIS_URL)
+    FastAPICache.init(
+        RedisBackend(redis),
+        prefix=settings.CACHE_PREFIX,
+        key_builder=request_key_builder,
+    )
+    return redis
+
+
+async def invalidate_cache(namespace: str) -> None:
+    """Drop all cached responses in a namespace."""
+    try:
+        await FastAPICache.clear(namespace=namespace)
+    except Exception as e:
+        logger.warning(f"Cache invalidation failed for {namespace}: {str(e)}")
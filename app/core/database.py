@@ -4,24 +4,39 @@ Database configuration and session management.
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy import create_engine
+from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 from app.core.config import settings
 
 # Async database engine
+# pool_recycle must stay below the PostgreSQL idle timeout so pooled
+# connections are recycled before the server drops them.
 async_engine = create_async_engine(
     settings.DATABASE_URL,
-    echo=settings.DEBUG,
+    echo=settings.SQL_ECHO,
     future=True,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_use_lifo=True,
     pool_pre_ping=True,
     pool_recycle=300,
+    connect_args={
+        # JIT compilation only pays off for long analytical queries
+        "server_settings": {"jit": "off"},
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    },
 )
 
 # Sync database engine (for migrations)
 sync_engine = create_engine(
     settings.DATABASE_URL_SYNC,
-    echo=settings.DEBUG,
+    echo=settings.SQL_ECHO,
     pool_pre_ping=True,
     pool_recycle=300,
 )
@@ -49,8 +64,20 @@ async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         try:
             yield session
-        finally:
-            await session.close()
+        except Exception:
+            await session.rollback()
+            raise
+
+
+@asynccontextmanager
+async def db_ctx() -> AsyncGenerator[AsyncSession, None]:
+    """Async database session for code outside request dependencies."""
+    async with AsyncSessionLocal() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
 
 
 def get_sync_db():
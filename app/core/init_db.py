@@ -2,7 +2,9 @@
 Database initialization script.
 """
 import asyncio
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from app.core.config import settings
 from app.core.database import Base
 from app.models import *  # Import all models to register them
@@ -10,9 +12,12 @@ from app.models import *  # Import all models to register them
 
 async def init_db():
     """Initialize database tables."""
-    engine = create_async_engine(settings.DATABASE_URL)
+    # One-shot engine: no pool to keep around after create_all
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
     
     async with engine.begin() as conn:
+        # DDL does not need to wait on WAL fsync
+        await conn.execute(text("SET LOCAL synchronous_commit = off"))
         # Create all tables
         await conn.run_sync(Base.metadata.create_all)
     
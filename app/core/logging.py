@@ -17,6 +17,7 @@ def setup_logging():
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
         level=settings.LOG_LEVEL,
         colorize=True,
+        enqueue=True,
     )
     
     # Add file logger
@@ -27,6 +28,7 @@ def setup_logging():
         rotation="1 day",
         retention="30 days",
         compression="zip",
+        enqueue=True,
     )
     
     # Add error file logger
@@ -37,6 +39,7 @@ def setup_logging():
         rotation="1 day",
         retention="90 days",
         compression="zip",
+        enqueue=True,
     )
 
 
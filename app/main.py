@@ -4,12 +4,18 @@ Main FastAPI application for the AI Agents platform.
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
-import time
+from fastapi.responses import ORJSONResponse
+from openai import AsyncOpenAI
+import asyncio
+import httpx
 import uvicorn
 
 from app.core.config import settings
+from app.core.cache import init_cache
 from app.core.logging import logger
+from app.core.middleware import ProcessTimeMiddleware
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.services.agent import purge_expired_memories
 from app.api import api_router
 import uuid
 
@@ -24,6 +30,7 @@ def create_application() -> FastAPI:
         openapi_url=f"{settings.API_V1_STR}/openapi.json",
         docs_url="/docs",
         redoc_url="/redoc",
+        default_response_class=ORJSONResponse,
     )
     origins = [
         "http://localhost:3000",
@@ -39,6 +46,7 @@ def create_application() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
     
     # Trusted host middleware
@@ -47,20 +55,15 @@ def create_application() -> FastAPI:
     #     allowed_hosts=["*"] if settings.DEBUG else ["localhost", "127.0.0.1"]
     # )
     
-    # Request timing middleware
-    @app.middleware("http")
-    async def add_process_time_header(request: Request, call_next):
-        start_time = time.time()
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        response.headers["X-Process-Time"] = str(process_time)
-        return response
+    # Request timing middleware (debug only)
+    if settings.DEBUG:
+        app.add_middleware(ProcessTimeMiddleware)
     
     # Exception handlers
     @app.exception_handler(Exception)
     async def global_exception_handler(request: Request, exc: Exception):
         logger.error(f"Global exception: {str(exc)}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"detail": "Internal server error"}
         )
@@ -102,12 +105,38 @@ async def startup_event():
     logger.info(f"Starting {settings.PROJECT_NAME} v{settings.VERSION}")
     logger.info(f"Debug mode: {settings.DEBUG}")
     logger.info(f"API v1 prefix: {settings.API_V1_STR}")
+    logger.info(f"Event loop: {type(asyncio.get_running_loop()).__module__}")
+    
+    # Shared OpenAI client so connections are pooled across requests
+    app.state.openai_client = AsyncOpenAI(
+        api_key=settings.OPENAI_API_KEY or "your-openai-api-key",
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(settings.OPENAI_TIMEOUT, connect=settings.OPENAI_CONNECT_TIMEOUT),
+            http2=settings.OPENAI_HTTP2,
+        ),
+    )
+
+    # Redis-backed response cache for read endpoints
+    app.state.redis = init_cache()
+    
+    # Expired agent memories are swept in bulk rather than on read
+    app.state.memory_purge_task = asyncio.create_task(
+        purge_expired_memories(settings.AGENT_MEMORY_PURGE_INTERVAL)
+    )
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown event."""
     logger.info(f"Shutting down {settings.PROJECT_NAME}")
+    app.state.memory_purge_task.cancel()
+    await app.state.openai_client.close()
+    await app.state.redis.close()
 
 
 if __name__ == "__main__":
@@ -115,6 +144,11 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=8000,
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
         reload=settings.DEBUG,
+        # reload supervises a single process; fan out only outside DEBUG
+        workers=1 if settings.DEBUG else settings.WEB_CONCURRENCY,
         log_level=settings.LOG_LEVEL.lower(),
     )
@@ -1,11 +1,11 @@
 """
 Agent database models.
 """
-from sqlalchemy import Column, String, Text, DateTime, Boolean, JSON, ForeignKey, Integer
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Text, DateTime, Boolean, ForeignKey, Integer, Index, UniqueConstraint, desc
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
-from datetime import datetime
-import uuid
+from sqlalchemy.sql import func
+from uuid6 import uuid7
 
 from app.core.database import Base
 
@@ -13,35 +13,45 @@ from app.core.database import Base
 class Agent(Base):
     """Agent model."""
     __tablename__ = "agents"
+    __table_args__ = (
+        Index("ix_agents_config_gin", "config", postgresql_using="gin", postgresql_ops={"config": "jsonb_path_ops"}),
+        Index("ix_agents_created_at", desc("created_at")),
+        UniqueConstraint("name", name="uq_agents_name"),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    name = Column(String(255), nullable=False, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    name = Column(String(255), nullable=False)
     description = Column(Text)
     agent_type = Column(String(100), nullable=False)  # e.g., "llm", "tool", "workflow"
     status = Column(String(50), default="idle")  # idle, running, error, completed
-    config = Column(JSON)  # Agent-specific configuration
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    config = Column(JSONB)  # Agent-specific configuration
+    created_at = Column(DateTime(timezone=True), server_default=func.current_timestamp())
+    updated_at = Column(DateTime(timezone=True), server_default=func.current_timestamp(), onupdate=func.current_timestamp())
     is_active = Column(Boolean, default=True)
     
     # Relationships
-    executions = relationship("AgentExecution", back_populates="agent", cascade="all, delete-orphan")
-    dependencies = relationship("AgentDependency", back_populates="agent", cascade="all, delete-orphan", foreign_keys="AgentDependency.agent_id")
+    # Collections must be loaded explicitly (see AgentRepository.get_with_details)
+    executions = relationship("AgentExecution", back_populates="agent", cascade="all, delete-orphan", lazy="raise_on_sql")
+    dependencies = relationship("AgentDependency", back_populates="agent", cascade="all, delete-orphan", foreign_keys="AgentDependency.agent_id", lazy="raise_on_sql")
 
 
 class AgentExecution(Base):
     """Agent execution history."""
     __tablename__ = "agent_executions"
+    __table_args__ = (
+        Index("ix_agent_executions_agent_created", "agent_id", desc("created_at"), desc("id")),
+        Index("ix_agent_executions_created_at", desc("created_at")),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     agent_id = Column(UUID(as_uuid=True), ForeignKey("agents.id"), nullable=False)
-    input_data = Column(JSON)
-    output_data = Column(JSON)
+    input_data = Column(JSONB)
+    output_data = Column(JSONB)
     status = Column(String(50), default="running")  # running, completed, failed
     error_message = Column(Text)
     execution_time = Column(Integer)  # in milliseconds
-    created_at = Column(DateTime, default=datetime.utcnow)
-    completed_at = Column(DateTime)
+    created_at = Column(DateTime(timezone=True), server_default=func.current_timestamp())
+    completed_at = Column(DateTime(timezone=True))
     
     # Relationships
     agent = relationship("Agent", back_populates="executions")
@@ -50,12 +60,16 @@ class AgentExecution(Base):
 class AgentDependency(Base):
     """Agent dependencies."""
     __tablename__ = "agent_dependencies"
+    __table_args__ = (
+        Index("ix_agent_dependencies_agent_created", "agent_id", desc("created_at")),
+        UniqueConstraint("agent_id", "depends_on_agent_id", name="uq_agent_dependency"),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     agent_id = Column(UUID(as_uuid=True), ForeignKey("agents.id"), nullable=False)
-    depends_on_agent_id = Column(UUID(as_uuid=True), ForeignKey("agents.id"), nullable=False)
+    depends_on_agent_id = Column(UUID(as_uuid=True), ForeignKey("agents.id"), nullable=False, index=True)
     dependency_type = Column(String(50), default="required")  # required, optional
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.current_timestamp())
     
     # Relationships
     agent = relationship("Agent", back_populates="dependencies", foreign_keys=[agent_id])
@@ -65,14 +79,19 @@ class AgentDependency(Base):
 class AgentMemory(Base):
     """Agent memory storage."""
     __tablename__ = "agent_memory"
+    __table_args__ = (
+        Index("ix_agent_memory_value_gin", "memory_value", postgresql_using="gin", postgresql_ops={"memory_value": "jsonb_path_ops"}),
+        Index("ix_agent_memory_agent_created", "agent_id", desc("created_at")),
+        UniqueConstraint("agent_id", "memory_key", name="uq_agent_memory_key"),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     agent_id = Column(UUID(as_uuid=True), ForeignKey("agents.id"), nullable=False)
     memory_key = Column(String(255), nullable=False)
-    memory_value = Column(JSON)
+    memory_value = Column(JSONB)
     memory_type = Column(String(50), default="episodic")  # episodic, semantic, procedural
-    created_at = Column(DateTime, default=datetime.utcnow)
-    expires_at = Column(DateTime)
+    created_at = Column(DateTime(timezone=True), server_default=func.current_timestamp())
+    expires_at = Column(DateTime(timezone=True))
     
     # Relationships
     agent = relationship("Agent")
@@ -1,16 +1,22 @@
-from sqlalchemy import Column, String, Integer, DateTime
+from sqlalchemy import Column, String, Integer, DateTime, Index, desc
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 class CustomerSession(Base):
     __tablename__ = "customer_sessions"
+    __table_args__ = (
+        Index("ix_customer_sessions_messages_gin", "messages", postgresql_using="gin", postgresql_ops={"messages": "jsonb_path_ops"}),
+        Index("ix_cs_customer_thread", "customer_id", "thread_id"),
+        Index("ix_cs_customer_created", "customer_id", desc("created_at"), desc("id")),
+        Index("ix_customer_sessions_created_at", desc("created_at")),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     thread_id = Column(String(255), nullable=True)
     customer_id = Column(Integer, nullable=True)
     session_status = Column(Integer, default=1, nullable=True)
-    messages = Column(JSONB, default='[]', nullable=True)
+    messages = Column(JSONB, default=list, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.current_timestamp(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.current_timestamp(), onupdate=func.current_timestamp(), nullable=False)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
\ No newline at end of file
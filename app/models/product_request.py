@@ -1,9 +1,12 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Index, desc
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 class ProductRequest(Base):
     __tablename__ = "product_requests"
+    __table_args__ = (
+        Index("ix_product_requests_session_created", "customer_session_id", desc("created_at")),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     customer_session_id = Column(Integer, ForeignKey("customer_sessions.id"), nullable=True)
@@ -1,304 +1,291 @@
 """
 Agent repository for database operations.
 """
-from typing import List, Optional, Dict, Any
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, and_, or_
+from typing import List, Optional, Dict, Any, Set, Tuple
+from sqlalchemy import select, update, delete, and_, or_, bindparam, exists, func, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import RowMapping
 from sqlalchemy.orm import selectinload
 from uuid import UUID
 from datetime import datetime
 
 from app.core.base import BaseRepository
 from app.models.agent import Agent, AgentExecution, AgentDependency, AgentMemory
-from app.schemas.agent import (
-    AgentCreate, 
-    AgentUpdate, 
-    AgentExecutionCreate, 
-    AgentExecutionUpdate,
-    AgentDependencyCreate,
-    AgentMemoryCreate,
-    AgentMemoryUpdate
+
+# Statements built once at import; per-call values are bound at execute time
+_GET_AGENT_WITH_DETAILS = select(Agent).where(Agent.id == bindparam("id")).options(
+    selectinload(Agent.executions), selectinload(Agent.dependencies)
+)
+_GET_AGENT_BY_NAME = select(Agent).where(Agent.name == bindparam("name"))
+
+# Removes an agent and all of its related rows in one statement; the foreign key
+# checks run at the end of the statement, after the CTE deletes have happened
+_DELETE_AGENT_WITH_RELATED = (
+    delete(Agent)
+    .where(Agent.id == bindparam("id"))
+    .add_cte(
+        delete(AgentExecution)
+        .where(AgentExecution.agent_id == bindparam("id"))
+        .returning(AgentExecution.id)
+        .cte("deleted_executions"),
+        delete(AgentDependency)
+        .where(or_(AgentDependency.agent_id == bindparam("id"), AgentDependency.depends_on_agent_id == bindparam("id")))
+        .returning(AgentDependency.id)
+        .cte("deleted_dependencies"),
+        delete(AgentMemory)
+        .where(AgentMemory.agent_id == bindparam("id"))
+        .returning(AgentMemory.id)
+        .cte("deleted_memories"),
+    )
+    .returning(Agent.id)
+)
+
+_GET_DEPENDENCIES_BY_AGENT = select(AgentDependency).where(AgentDependency.agent_id == bindparam("agent_id"))
+_DEPENDENCY_EXISTS = select(
+    exists().where(
+        and_(
+            AgentDependency.agent_id == bindparam("agent_id"),
+            AgentDependency.depends_on_agent_id == bindparam("depends_on_agent_id"),
+        )
+    )
+)
+# Every agent reachable from :start by following depends_on edges; UNION stops at cycles
+_reachable = (
+    select(AgentDependency.depends_on_agent_id.label("agent_id"))
+    .where(AgentDependency.agent_id == bindparam("start"))
+    .cte("reachable", recursive=True)
+)
+_reachable = _reachable.union(
+    select(AgentDependency.depends_on_agent_id).join(
+        _reachable, AgentDependency.agent_id == _reachable.c.agent_id
+    )
+)
+_GET_REACHABLE_AGENTS = select(_reachable.c.agent_id)
+_DELETE_DEPENDENCY_BY_AGENTS = (
+    delete(AgentDependency)
+    .where(
+        and_(
+            AgentDependency.agent_id == bindparam("agent_id"),
+            AgentDependency.depends_on_agent_id == bindparam("depends_on_agent_id"),
+        )
+    )
+    .returning(AgentDependency.id)
+)
+
+# Expired memories stay invisible to every read until purge_expired removes them
+_MEMORY_NOT_EXPIRED = or_(AgentMemory.expires_at.is_(None), AgentMemory.expires_at > func.now())
+_GET_MEMORIES_BY_AGENT = select(AgentMemory).where(
+    and_(AgentMemory.agent_id == bindparam("agent_id"), _MEMORY_NOT_EXPIRED)
+)
+_GET_MEMORY_BY_KEY = select(AgentMemory).where(
+    and_(
+        AgentMemory.agent_id == bindparam("agent_id"),
+        AgentMemory.memory_key == bindparam("memory_key"),
+        _MEMORY_NOT_EXPIRED,
+    )
+)
+_GET_MEMORIES_BY_KEYS = select(AgentMemory).where(
+    and_(
+        AgentMemory.agent_id == bindparam("agent_id"),
+        AgentMemory.memory_key.in_(bindparam("keys", expanding=True)),
+        _MEMORY_NOT_EXPIRED,
+    )
+)
+_PURGE_EXPIRED_MEMORIES = delete(AgentMemory).where(AgentMemory.expires_at <= func.now())
+_DELETE_MEMORY_BY_KEY = (
+    delete(AgentMemory)
+    .where(
+        and_(
+            AgentMemory.agent_id == bindparam("agent_id"),
+            AgentMemory.memory_key == bindparam("memory_key"),
+        )
+    )
+    .returning(AgentMemory.id)
 )
 
 
 class AgentRepository(BaseRepository[Agent]):
     """Repository for Agent model."""
     
-    def __init__(self, db: AsyncSession):
-        super().__init__(db)
-        self.model = Agent
-    
-    async def get(self, id: UUID) -> Optional[Agent]:
-        """Get agent by ID."""
-        result = await self.db.execute(
-            select(Agent)
-            .options(selectinload(Agent.executions), selectinload(Agent.dependencies))
-            .where(Agent.id == id)
-        )
+    __slots__ = ()
+    model = Agent
+    
+    # Columns serialized by list endpoints; selecting them skips ORM object construction
+    list_columns = (
+        Agent.id,
+        Agent.name,
+        Agent.description,
+        Agent.agent_type,
+        Agent.status,
+        Agent.config,
+        Agent.created_at,
+        Agent.updated_at,
+        Agent.is_active,
+    )
+    
+    async def get_with_details(self, id: UUID) -> Optional[Agent]:
+        """Get agent by ID with executions and dependencies loaded."""
+        result = await self.db.execute(_GET_AGENT_WITH_DETAILS, {"id": id})
         return result.scalar_one_or_none()
     
     async def get_by_name(self, name: str) -> Optional[Agent]:
         """Get agent by name."""
-        result = await self.db.execute(
-            select(Agent).where(Agent.name == name)
-        )
+        result = await self.db.execute(_GET_AGENT_BY_NAME, {"name": name})
         return result.scalar_one_or_none()
     
-    async def get_multi(self, skip: int = 0, limit: int = 100) -> List[Agent]:
+    async def get_multi(self, skip: int = 0, limit: int = 100) -> List[RowMapping]:
         """Get multiple agents."""
         result = await self.db.execute(
-            select(Agent)
+            select(*self.list_columns)
             .offset(skip)
             .limit(limit)
             .order_by(Agent.created_at.desc())
         )
-        return result.scalars().all()
+        return result.mappings().all()
     
-    async def get_active_agents(self) -> List[Agent]:
+    async def get_active_agents(self) -> List[RowMapping]:
         """Get all active agents."""
         result = await self.db.execute(
-            select(Agent).where(Agent.is_active == True)
+            select(*self.list_columns).where(Agent.is_active == True)
         )
-        return result.scalars().all()
+        return result.mappings().all()
     
-    async def get_by_type(self, agent_type: str) -> List[Agent]:
+    async def get_by_type(self, agent_type: str) -> List[RowMapping]:
         """Get agents by type."""
         result = await self.db.execute(
-            select(Agent).where(Agent.agent_type == agent_type)
+            select(*self.list_columns).where(Agent.agent_type == agent_type)
         )
-        return result.scalars().all()
+        return result.mappings().all()
     
-    async def create(self, obj_in: AgentCreate) -> Agent:
-        """Create new agent."""
-        db_obj = Agent(**obj_in.dict())
-        self.db.add(db_obj)
+    async def delete_with_related(self, id: UUID) -> bool:
+        """Delete an agent with its executions, dependencies and memories in one round trip."""
+        result = await self.db.execute(_DELETE_AGENT_WITH_RELATED, {"id": id})
+        deleted = result.first()
         await self.db.commit()
-        await self.db.refresh(db_obj)
-        return db_obj
-    
-    async def update(self, id: UUID, obj_in: AgentUpdate) -> Optional[Agent]:
-        """Update agent."""
-        update_data = obj_in.dict(exclude_unset=True)
-        if update_data:
-            update_data["updated_at"] = datetime.utcnow()
-            await self.db.execute(
-                update(Agent)
-                .where(Agent.id == id)
-                .values(**update_data)
-            )
-            await self.db.commit()
-        return await self.get(id)
-    
-    async def delete(self, id: UUID) -> bool:
-        """Delete agent."""
-        result = await self.db.execute(
-            delete(Agent).where(Agent.id == id)
-        )
-        await self.db.commit()
-        return result.rowcount > 0
+        return deleted is not None
     
     async def update_status(self, id: UUID, status: str) -> Optional[Agent]:
         """Update agent status."""
-        await self.db.execute(
+        result = await self.db.execute(
             update(Agent)
             .where(Agent.id == id)
-            .values(status=status, updated_at=datetime.utcnow())
+            .values(status=status)
+            .returning(Agent)
         )
+        updated = result.scalar_one_or_none()
         await self.db.commit()
-        return await self.get(id)
+        return updated
 
 
 class AgentExecutionRepository(BaseRepository[AgentExecution]):
     """Repository for AgentExecution model."""
     
-    def __init__(self, db: AsyncSession):
-        super().__init__(db)
-        self.model = AgentExecution
-    
-    async def get(self, id: UUID) -> Optional[AgentExecution]:
-        """Get execution by ID."""
-        result = await self.db.execute(
-            select(AgentExecution).where(AgentExecution.id == id)
-        )
-        return result.scalar_one_or_none()
-    
-    async def get_multi(self, skip: int = 0, limit: int = 100) -> List[AgentExecution]:
-        """Get multiple executions."""
-        result = await self.db.execute(
-            select(AgentExecution)
-            .offset(skip)
-            .limit(limit)
-            .order_by(AgentExecution.created_at.desc())
-        )
-        return result.scalars().all()
-    
-    async def get_by_agent(self, agent_id: UUID, skip: int = 0, limit: int = 100) -> List[AgentExecution]:
-        """Get executions by agent ID."""
+    __slots__ = ()
+    model = AgentExecution
+    
+    async def get_by_agent(
+        self,
+        agent_id: UUID,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[Tuple[datetime, UUID]] = None,
+    ) -> List[AgentExecution]:
+        """Get executions by agent ID, newest first, after an optional (created_at, id) cursor."""
+        stmt = select(AgentExecution).where(AgentExecution.agent_id == agent_id)
+        if cursor:
+            stmt = stmt.where(tuple_(AgentExecution.created_at, AgentExecution.id) < tuple_(*cursor))
         result = await self.db.execute(
-            select(AgentExecution)
-            .where(AgentExecution.agent_id == agent_id)
+            stmt
             .offset(skip)
             .limit(limit)
-            .order_by(AgentExecution.created_at.desc())
+            .order_by(AgentExecution.created_at.desc(), AgentExecution.id.desc())
         )
         return result.scalars().all()
-    
-    async def create(self, obj_in: AgentExecutionCreate) -> AgentExecution:
-        """Create new execution."""
-        db_obj = AgentExecution(**obj_in.dict())
-        self.db.add(db_obj)
-        await self.db.commit()
-        await self.db.refresh(db_obj)
-        return db_obj
-    
-    async def update(self, id: UUID, obj_in: AgentExecutionUpdate) -> Optional[AgentExecution]:
-        """Update execution."""
-        update_data = obj_in.dict(exclude_unset=True)
-        if update_data:
-            await self.db.execute(
-                update(AgentExecution)
-                .where(AgentExecution.id == id)
-                .values(**update_data)
-            )
-            await self.db.commit()
-        return await self.get(id)
-    
-    async def delete(self, id: UUID) -> bool:
-        """Delete execution."""
-        result = await self.db.execute(
-            delete(AgentExecution).where(AgentExecution.id == id)
-        )
-        await self.db.commit()
-        return result.rowcount > 0
 
 
 class AgentDependencyRepository(BaseRepository[AgentDependency]):
     """Repository for AgentDependency model."""
     
-    def __init__(self, db: AsyncSession):
-        super().__init__(db)
-        self.model = AgentDependency
-    
-    async def get(self, id: UUID) -> Optional[AgentDependency]:
-        """Get dependency by ID."""
-        result = await self.db.execute(
-            select(AgentDependency).where(AgentDependency.id == id)
-        )
-        return result.scalar_one_or_none()
-    
-    async def get_multi(self, skip: int = 0, limit: int = 100) -> List[AgentDependency]:
-        """Get multiple dependencies."""
-        result = await self.db.execute(
-            select(AgentDependency)
-            .offset(skip)
-            .limit(limit)
-            .order_by(AgentDependency.created_at.desc())
-        )
-        return result.scalars().all()
+    __slots__ = ()
+    model = AgentDependency
     
     async def get_by_agent(self, agent_id: UUID) -> List[AgentDependency]:
         """Get dependencies by agent ID."""
-        result = await self.db.execute(
-            select(AgentDependency).where(AgentDependency.agent_id == agent_id)
-        )
+        result = await self.db.execute(_GET_DEPENDENCIES_BY_AGENT, {"agent_id": agent_id})
         return result.scalars().all()
     
-    async def create(self, obj_in: AgentDependencyCreate) -> AgentDependency:
-        """Create new dependency."""
-        db_obj = AgentDependency(**obj_in.dict())
-        self.db.add(db_obj)
-        await self.db.commit()
-        await self.db.refresh(db_obj)
-        return db_obj
+    async def exists(self, agent_id: UUID, depends_on_agent_id: UUID) -> bool:
+        """Check whether an agent already depends on another."""
+        result = await self.db.execute(
+            _DEPENDENCY_EXISTS, {"agent_id": agent_id, "depends_on_agent_id": depends_on_agent_id}
+        )
+        return result.scalar_one()
     
-    async def update(self, id: UUID, obj_in: AgentDependencyCreate) -> Optional[AgentDependency]:
-        """Update dependency."""
-        update_data = obj_in.dict(exclude_unset=True)
-        if update_data:
-            await self.db.execute(
-                update(AgentDependency)
-                .where(AgentDependency.id == id)
-                .values(**update_data)
-            )
-            await self.db.commit()
-        return await self.get(id)
+    async def reachable_from(self, agent_id: UUID) -> Set[UUID]:
+        """Get every agent an agent depends on, directly or transitively, in one query."""
+        result = await self.db.execute(_GET_REACHABLE_AGENTS, {"start": agent_id})
+        return set(result.scalars())
     
-    async def delete(self, id: UUID) -> bool:
-        """Delete dependency."""
+    async def delete_by_agents(self, agent_id: UUID, depends_on_agent_id: UUID) -> bool:
+        """Delete the dependency between two agents; False if there was none."""
         result = await self.db.execute(
-            delete(AgentDependency).where(AgentDependency.id == id)
+            _DELETE_DEPENDENCY_BY_AGENTS, {"agent_id": agent_id, "depends_on_agent_id": depends_on_agent_id}
         )
+        deleted = result.first()
         await self.db.commit()
-        return result.rowcount > 0
+        return deleted is not None
 
 
 class AgentMemoryRepository(BaseRepository[AgentMemory]):
     """Repository for AgentMemory model."""
     
-    def __init__(self, db: AsyncSession):
-        super().__init__(db)
-        self.model = AgentMemory
-    
-    async def get(self, id: UUID) -> Optional[AgentMemory]:
-        """Get memory by ID."""
-        result = await self.db.execute(
-            select(AgentMemory).where(AgentMemory.id == id)
-        )
-        return result.scalar_one_or_none()
-    
-    async def get_multi(self, skip: int = 0, limit: int = 100) -> List[AgentMemory]:
-        """Get multiple memories."""
-        result = await self.db.execute(
-            select(AgentMemory)
-            .offset(skip)
-            .limit(limit)
-            .order_by(AgentMemory.created_at.desc())
-        )
-        return result.scalars().all()
+    __slots__ = ()
+    model = AgentMemory
     
     async def get_by_agent(self, agent_id: UUID) -> List[AgentMemory]:
-        """Get memories by agent ID."""
-        result = await self.db.execute(
-            select(AgentMemory).where(AgentMemory.agent_id == agent_id)
-        )
+        """Get unexpired memories by agent ID."""
+        result = await self.db.execute(_GET_MEMORIES_BY_AGENT, {"agent_id": agent_id})
         return result.scalars().all()
     
     async def get_by_key(self, agent_id: UUID, memory_key: str) -> Optional[AgentMemory]:
         """Get memory by agent ID and key."""
-        result = await self.db.execute(
-            select(AgentMemory).where(
-                and_(
-                    AgentMemory.agent_id == agent_id,
-                    AgentMemory.memory_key == memory_key
-                )
-            )
-        )
+        result = await self.db.execute(_GET_MEMORY_BY_KEY, {"agent_id": agent_id, "memory_key": memory_key})
         return result.scalar_one_or_none()
     
-    async def create(self, obj_in: AgentMemoryCreate) -> AgentMemory:
-        """Create new memory."""
-        db_obj = AgentMemory(**obj_in.dict())
-        self.db.add(db_obj)
+    async def get_by_keys(self, agent_id: UUID, keys: List[str]) -> Dict[str, AgentMemory]:
+        """Get memories for several keys in one query, keyed by memory_key."""
+        if not keys:
+            return {}
+        result = await self.db.execute(_GET_MEMORIES_BY_KEYS, {"agent_id": agent_id, "keys": list(keys)})
+        return {memory.memory_key: memory for memory in result.scalars()}
+    
+    async def delete_by_key(self, agent_id: UUID, memory_key: str) -> bool:
+        """Delete memory by agent ID and key; False if there was none."""
+        result = await self.db.execute(_DELETE_MEMORY_BY_KEY, {"agent_id": agent_id, "memory_key": memory_key})
+        deleted = result.first()
         await self.db.commit()
-        await self.db.refresh(db_obj)
-        return db_obj
+        return deleted is not None
     
-    async def update(self, id: UUID, obj_in: AgentMemoryUpdate) -> Optional[AgentMemory]:
-        """Update memory."""
-        update_data = obj_in.dict(exclude_unset=True)
-        if update_data:
-            await self.db.execute(
-                update(AgentMemory)
-                .where(AgentMemory.id == id)
-                .values(**update_data)
+    async def purge_expired(self) -> int:
+        """Delete every expired memory; returns the number of rows removed."""
+        result = await self.db.execute(_PURGE_EXPIRED_MEMORIES)
+        await self.db.commit()
+        return result.rowcount
+    
+    async def upsert(self, agent_id: UUID, memory_key: str, values: Dict[str, Any]) -> AgentMemory:
+        """Insert memory or overwrite the existing row for the same agent and key."""
+        stmt = pg_insert(AgentMemory).values(agent_id=agent_id, memory_key=memory_key, **values)
+        # With no values, a no-op SET still lets RETURNING yield the existing row
+        stmt = (
+            stmt.on_conflict_do_update(
+                index_elements=["agent_id", "memory_key"],
+                set_={key: stmt.excluded[key] for key in values} or {"memory_key": stmt.excluded.memory_key},
             )
-            await self.db.commit()
-        return await self.get(id)
-    
-    async def delete(self, id: UUID) -> bool:
-        """Delete memory."""
-        result = await self.db.execute(
-            delete(AgentMemory).where(AgentMemory.id == id)
+            .returning(AgentMemory)
+            .execution_options(populate_existing=True)
         )
+        result = await self.db.execute(stmt)
+        memory = result.scalar_one()
         await self.db.commit()
-        return result.rowcount > 0
+        return memory
+
@@ -1,54 +1,45 @@
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
+from contextlib import asynccontextmanager
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, and_
+from sqlalchemy import select, insert, update, and_, bindparam, case, func, literal, tuple_
+from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 
 from app.core.base import BaseRepository
 from app.models.customer_session import CustomerSession
 from app.models.product_request import ProductRequest
-from app.schemas.customer_session import CustomerSessionCreate, CustomerSessionUpdate
+
+# Statements built once at import; per-call values are bound at execute time
+_GET_CUSTOMER_SESSION = (
+    select(CustomerSession)
+    .where(and_(CustomerSession.customer_id.is_not_distinct_from(bindparam("customer_id")), CustomerSession.thread_id == bindparam("thread_id")))
+    .limit(1)
+)
 
 class ChatRepository(BaseRepository[CustomerSession]):
-    def __init__(self, db: AsyncSession):
-        super().__init__(db)
-        self.model = CustomerSession
-    
-    async def get(self, id: int) -> Optional[CustomerSession]:
-        result = await self.db.execute(
-            select(CustomerSession).where(CustomerSession.id == id)
-        )
-        return result.scalar_one_or_none()
-    
-    async def get_multi(self, skip: int = 0, limit: int = 100) -> List[CustomerSession]:
-        result = await self.db.execute(
-            select(CustomerSession)
-            .offset(skip)
-            .limit(limit)
-            .order_by(CustomerSession.created_at.desc())
-        )
-        return result.scalars().all()
+    __slots__ = ()
+    model = CustomerSession
     
     async def get_customer_session(self, thread_id: str, customer_id: int = None) -> Optional[CustomerSession]:
-        result = await self.db.execute(
-            select(CustomerSession).where(CustomerSession.thread_id == thread_id, CustomerSession.customer_id == customer_id)
-        )
+        result = await self.db.execute(_GET_CUSTOMER_SESSION, {"customer_id": customer_id, "thread_id": thread_id})
         return result.scalar_one_or_none()
     
-    async def get_by_customer_id(self, customer_id: int) -> List[CustomerSession]:
+    async def get_by_customer_id(
+        self,
+        customer_id: int,
+        limit: int = 100,
+        cursor: Optional[Tuple[datetime, int]] = None,
+    ) -> List[CustomerSession]:
+        stmt = select(CustomerSession).where(CustomerSession.customer_id == customer_id)
+        if cursor:
+            stmt = stmt.where(tuple_(CustomerSession.created_at, CustomerSession.id) < tuple_(*cursor))
         result = await self.db.execute(
-            select(CustomerSession)
-            .where(CustomerSession.customer_id == customer_id)
-            .order_by(CustomerSession.created_at.desc())
+            stmt
+            .order_by(CustomerSession.created_at.desc(), CustomerSession.id.desc())
+            .limit(limit)
         )
         return result.scalars().all()
     
-    async def create(self, obj_in: CustomerSessionCreate) -> CustomerSession:
-        db_obj = CustomerSession(**obj_in.dict())
-        self.db.add(db_obj)
-        await self.db.commit()
-        await self.db.refresh(db_obj)
-        return db_obj
-    
     async def insert_session(self, session_status: int = 1, thread_id: str = None, customer_id: int = None) -> CustomerSession:
         db_obj = CustomerSession(
             session_status=session_status,
@@ -57,77 +48,51 @@ class ChatRepository(BaseRepository[CustomerSession]):
         )
         self.db.add(db_obj)
         await self.db.commit()
-        await self.db.refresh(db_obj)
         return db_obj
     
-    async def update(self, id: int, obj_in: CustomerSessionUpdate) -> Optional[CustomerSession]:
-        update_data = obj_in.dict(exclude_unset=True)
-        if update_data:
-            update_data["updated_at"] = datetime.utcnow()
-            await self.db.execute(
-                update(CustomerSession)
-                .where(CustomerSession.id == id)
-                .values(**update_data)
-            )
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[AsyncSession]:
+        """Commit the writes made in the block once, or roll them all back."""
+        try:
+            yield self.db
             await self.db.commit()
-        return await self.get(id)
+        except Exception:
+            await self.db.rollback()
+            raise
     
-    async def delete(self, id: int) -> bool:
+    async def insert_messages(self, session_id: int, messages: List[Dict[str, Any]], session_status: int = 1, commit: bool = True) -> bool:
+        """Append messages to the messages JSONB column for a session."""
+        # Append server-side so only the new messages cross the wire; rows
+        # holding a non-array (legacy '"[]"' default or NULL) start a new array
+        new_messages = literal(messages, type_=JSONB)
+        values = {
+            "messages": case(
+                (func.jsonb_typeof(CustomerSession.messages) == "array",
+                 CustomerSession.messages.op("||", return_type=JSONB)(new_messages)),
+                else_=new_messages,
+            ),
+        }
+        if session_status is not None:
+            values["session_status"] = session_status
         result = await self.db.execute(
-            delete(CustomerSession).where(CustomerSession.id == id)
+            update(CustomerSession)
+            .where(CustomerSession.id == session_id)
+            .values(**values)
         )
-        await self.db.commit()
-        return result.rowcount > 0
-    
-    async def insert_message(self, session_id: int, messages: str = None, session_status: int = 1) -> bool:
-        """Insert a message into the messages JSONB column for a session."""
-        try:
-            if session_status is not None:
-                 await self.db.execute(
-                update(CustomerSession)
-                .where(CustomerSession.id == session_id)
-                .values(messages=messages, session_status=session_status, updated_at=datetime.utcnow())
-            )
-            else:
-                await self.db.execute(
-                update(CustomerSession)
-                .where(CustomerSession.id == session_id)
-                .values(messages=messages, updated_at=datetime.utcnow())
-            )
-           
+        if commit:
             await self.db.commit()
-            
-            print(f"Message inserted for session_id: {session_id}")
-            return True
-            
-        except Exception as e:
-            print(f"Error inserting message: {e}")
-            await self.db.rollback()
-            return False
+        return result.rowcount > 0
     
-    async def create_multiple_product_requests(self, product_requests: List[Dict[str, Any]]) -> List[ProductRequest]:
-        """Create multiple product requests in a single transaction."""
-        try:
-            db_objects = []
-            for pr_data in product_requests:
-                db_obj = ProductRequest(
-                    customer_session_id=pr_data.get("customer_session_id"),
-                    product_name=pr_data.get("product_name"),
-                    quantity=pr_data.get("quantity", 0),
-                    country=pr_data.get("country")
-                )
-                db_objects.append(db_obj)
-            
-            self.db.add_all(db_objects)
-            await self.db.commit()
-            for obj in db_objects:
-                await self.db.refresh(obj)
-            return db_objects
-            
-        except Exception as e:
-            print(f"Error creating product requests: {e}")
-            await self.db.rollback()
+    async def create_multiple_product_requests(self, product_requests: List[Dict[str, Any]], commit: bool = True) -> List[ProductRequest]:
+        """Create multiple product requests in a single transaction; rows are ProductRequest column dicts."""
+        if not product_requests:
             return []
+        
+        # Single executemany INSERT that hands back the stored rows
+        result = await self.db.execute(insert(ProductRequest).returning(ProductRequest), product_requests)
+        if commit:
+            await self.db.commit()
+        return list(result.scalars())
     
     async def get_product_requests_by_session_id(self, customer_session_id: int) -> List[ProductRequest]:
         """Get all product requests for a specific customer session."""
@@ -0,0 +1,42 @@
+"""
+msgspec mirrors of the session and dependency schemas for hot response paths.
+
+The Pydantic models stay the source of truth for validation and OpenAPI;
+these structs only carry already-stored rows out to the client.
+"""
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from uuid import UUID
+import msgspec
+
+from app.schemas.customer_session import coerce_messages
+
+class CustomerSessionFast(msgspec.Struct, frozen=True, kw_only=True):
+    thread_id: Optional[str] = None
+    customer_id: Optional[int] = None
+    session_status: int = 1
+    messages: List[Dict[str, Any]] = []
+    id: int
+    created_at: datetime
+    updated_at: datetime
+    deleted_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, row: Any) -> "CustomerSessionFast":
+        """Build from a CustomerSession ORM row."""
+        return cls(
+            thread_id=row.thread_id,
+            customer_id=row.customer_id,
+            session_status=row.session_status,
+            messages=coerce_messages(row.messages),
+            id=row.id,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+            deleted_at=row.deleted_at,
+        )
+
+class AgentDependencyFast(msgspec.Struct, frozen=True):
+    id: UUID
+    depends_on_agent_id: UUID
+    dependency_type: Optional[str]
+    created_at: datetime
@@ -2,7 +2,7 @@
 Agent Pydantic schemas for API serialization.
 """
 from typing import Optional, Dict, Any, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 from datetime import datetime
 from uuid import UUID
 
@@ -55,6 +55,11 @@ class AgentExecutionBase(BaseModel):
 class AgentExecutionCreate(AgentExecutionBase):
     """Schema for creating an agent execution."""
     agent_id: UUID
+    status: str = "running"
+    output_data: Optional[Dict[str, Any]] = None
+    error_message: Optional[str] = None
+    execution_time: Optional[int] = None
+    completed_at: Optional[datetime] = None
 
 
 class AgentExecutionUpdate(BaseModel):
@@ -168,3 +173,8 @@ class AgentExecutionResponse(BaseModel):
     output_data: Optional[Dict[str, Any]] = None
     error_message: Optional[str] = None
     execution_time: Optional[int] = None
+
+
+# List validators built once at import and reused by list endpoints
+AgentListAdapter = TypeAdapter(List[Agent])
+AgentMemoryListAdapter = TypeAdapter(List[AgentMemory])
@@ -1,7 +1,7 @@
 """
 Chat Pydantic schemas for API serialization.
 """
-from typing import Optional, Dict, Any, Literal, List
+from typing import Optional, Dict, Any, Literal, List, Union
 from pydantic import BaseModel, Field
 
 
@@ -36,5 +36,5 @@ class WebSocketChatRequest(BaseModel):
     """Schema for WebSocket chat request."""
     message: str = Field(..., min_length=1, max_length=10000)
     thread_id: Optional[str] = None
-    customer_id: Optional[str] = None
+    customer_id: Optional[Union[int, str]] = Field(...)
     is_initial: Optional[bool] = False
@@ -1,7 +1,20 @@
 from typing import Optional, List, Dict, Any, Union
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, field_validator
 from datetime import datetime
-import json
+
+# Parses and validates a stringified messages column in one pass
+_MESSAGES_ADAPTER = TypeAdapter(List[Dict[str, Any]])
+
+def coerce_messages(v: Any) -> List[Dict[str, Any]]:
+    """Return a messages column value as a list, decoding legacy stringified rows."""
+    if isinstance(v, list):
+        return v
+    if isinstance(v, (str, bytes)):
+        try:
+            return _MESSAGES_ADAPTER.validate_json(v)
+        except ValidationError:
+            return []
+    return []
 
 class CustomerSessionBase(BaseModel):
     thread_id: Optional[str] = None
@@ -20,24 +33,17 @@ class CustomerSessionUpdate(BaseModel):
     deleted_at: Optional[datetime] = None
 
 class CustomerSession(CustomerSessionBase):
+    """Customer session; build from raw JSON with model_validate_json to parse it in one pass."""
     id: int
     created_at: datetime
     updated_at: datetime
     deleted_at: Optional[datetime] = None
 
-    @validator('messages', pre=True)
+    @field_validator('messages', mode='before')
+    @classmethod
     def parse_messages(cls, v):
         """Parse messages field from string to list if needed."""
-        if v is None:
-            return []
-        if isinstance(v, str):
-            try:
-                return json.loads(v)
-            except (json.JSONDecodeError, TypeError):
-                return []
-        if isinstance(v, list):
-            return v
-        return []
+        return coerce_messages(v)
 
     class Config:
         from_attributes = True
\ No newline at end of file
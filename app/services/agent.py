@@ -1,11 +1,14 @@
 """
 Agent service layer for business logic.
 """
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timezone
 import asyncio
 import time
+import msgspec
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.exc import IntegrityError
 
 from app.core.base import BaseService
 from app.repositories.agent import (
@@ -14,17 +17,21 @@ from app.repositories.agent import (
     AgentDependencyRepository,
     AgentMemoryRepository,
 )
+from app.schemas._fast import AgentDependencyFast
 from app.schemas.agent import (
     AgentCreate,
     AgentUpdate,
     AgentExecutionCreate,
     AgentExecutionUpdate,
+    AgentDependencyCreate,
     AgentMemoryCreate,
     AgentMemoryUpdate,
     AgentExecutionRequest,
     AgentExecutionResponse,
 )
 from app.models.agent import Agent, AgentExecution
+from app.core.config import settings
+from app.core.database import db_ctx
 from app.core.logging import logger
 
 
@@ -53,71 +60,58 @@ class AgentService(BaseService[Agent]):
         """Get agent by ID."""
         return await self.agent_repo.get(id)
     
+    async def get_with_details(self, id: UUID) -> Optional[Agent]:
+        """Get agent by ID with executions and dependencies."""
+        return await self.agent_repo.get_with_details(id)
+    
     async def get_by_name(self, name: str) -> Optional[Agent]:
         """Get agent by name."""
         return await self.agent_repo.get_by_name(name)
     
-    async def get_multi(self, skip: int = 0, limit: int = 100) -> List[Agent]:
+    async def get_multi(self, skip: int = 0, limit: int = 100) -> List[RowMapping]:
         """Get multiple agents."""
         return await self.agent_repo.get_multi(skip, limit)
     
-    async def get_active_agents(self) -> List[Agent]:
+    async def get_active_agents(self) -> List[RowMapping]:
         """Get all active agents."""
         return await self.agent_repo.get_active_agents()
     
-    async def get_by_type(self, agent_type: str) -> List[Agent]:
+    async def get_by_type(self, agent_type: str) -> List[RowMapping]:
         """Get agents by type."""
         return await self.agent_repo.get_by_type(agent_type)
     
     async def create(self, obj_in: AgentCreate) -> Agent:
         """Create new agent."""
-        # Check if agent with same name already exists
-        existing_agent = await self.agent_repo.get_by_name(obj_in.name)
-        if existing_agent:
-            raise ValueError(f"Agent with name '{obj_in.name}' already exists")
-        
-        agent = await self.agent_repo.create(obj_in)
+        try:
+            agent = await self.agent_repo.create(obj_in)
+        except IntegrityError as e:
+            self._raise_if_name_taken(e, obj_in.name)
+            raise
         logger.info(f"Created agent: {agent.name} ({agent.id})")
         return agent
     
     async def update(self, id: UUID, obj_in: AgentUpdate) -> Optional[Agent]:
         """Update agent."""
-        # Check if name is being updated and if it conflicts
-        if obj_in.name:
-            existing_agent = await self.agent_repo.get_by_name(obj_in.name)
-            if existing_agent and existing_agent.id != id:
-                raise ValueError(f"Agent with name '{obj_in.name}' already exists")
-        
-        agent = await self.agent_repo.update(id, obj_in)
+        try:
+            agent = await self.agent_repo.update(id, obj_in)
+        except IntegrityError as e:
+            self._raise_if_name_taken(e, obj_in.name)
+            raise
         if agent:
             logger.info(f"Updated agent: {agent.name} ({agent.id})")
         return agent
     
+    @staticmethod
+    def _raise_if_name_taken(error: IntegrityError, name: Optional[str]) -> None:
+        """Turn a violation of the unique agent name into a ValueError."""
+        if "uq_agents_name" in str(error.orig):
+            raise ValueError(f"Agent with name '{name}' already exists") from error
+    
     async def delete(self, id: UUID) -> bool:
         """Delete agent."""
-        agent = await self.agent_repo.get(id)
-        if not agent:
-            return False
-        
-        # Delete related data
-        if self.execution_repo:
-            executions = await self.execution_repo.get_by_agent(id)
-            for execution in executions:
-                await self.execution_repo.delete(execution.id)
-        
-        if self.dependency_repo:
-            dependencies = await self.dependency_repo.get_by_agent(id)
-            for dependency in dependencies:
-                await self.dependency_repo.delete(dependency.id)
-        
-        if self.memory_repo:
-            memories = await self.memory_repo.get_by_agent(id)
-            for memory in memories:
-                await self.memory_repo.delete(memory.id)
-        
-        success = await self.agent_repo.delete(id)
+        success = await self.agent_repo.delete_with_related(id)
         if success:
-            logger.info(f"Deleted agent: {agent.name} ({agent.id})")
+            logger.info(f"Deleted agent: {id}")
         return success
     
     async def update_status(self, id: UUID, status: str) -> Optional[Agent]:
@@ -133,16 +127,13 @@ class AgentService(BaseService[Agent]):
             raise ValueError("Dependency repository not set")
         
         # Check if dependency already exists
-        dependencies = await self.dependency_repo.get_by_agent(agent_id)
-        for dep in dependencies:
-            if dep.depends_on_agent_id == depends_on_agent_id:
-                return False
+        if await self.dependency_repo.exists(agent_id, depends_on_agent_id):
+            return False
         
         # Check for circular dependencies
         if await self._check_circular_dependency(agent_id, depends_on_agent_id):
             raise ValueError("Circular dependency detected")
         
-        from app.schemas.agent import AgentDependencyCreate
         dependency_data = AgentDependencyCreate(
             agent_id=agent_id,
             depends_on_agent_id=depends_on_agent_id,
@@ -158,14 +149,10 @@ class AgentService(BaseService[Agent]):
         if not self.dependency_repo:
             raise ValueError("Dependency repository not set")
         
-        dependencies = await self.dependency_repo.get_by_agent(agent_id)
-        for dep in dependencies:
-            if dep.depends_on_agent_id == depends_on_agent_id:
-                success = await self.dependency_repo.delete(dep.id)
-                if success:
-                    logger.info(f"Removed dependency: {agent_id} -> {depends_on_agent_id}")
-                return success
-        return False
+        success = await self.dependency_repo.delete_by_agents(agent_id, depends_on_agent_id)
+        if success:
+            logger.info(f"Removed dependency: {agent_id} -> {depends_on_agent_id}")
+        return success
     
     async def get_dependencies(self, agent_id: UUID) -> List[Dict[str, Any]]:
         """Get agent dependencies."""
@@ -173,31 +160,16 @@ class AgentService(BaseService[Agent]):
             return []
         
         dependencies = await self.dependency_repo.get_by_agent(agent_id)
-        return [
-            {
-                "id": str(dep.id),
-                "depends_on_agent_id": str(dep.depends_on_agent_id),
-                "dependency_type": dep.dependency_type,
-                "created_at": dep.created_at.isoformat(),
-            }
-            for dep in dependencies
-        ]
+        # Attribute extraction and UUID/datetime stringification both run in msgspec's C code
+        structs = msgspec.convert(dependencies, List[AgentDependencyFast], from_attributes=True)
+        return msgspec.to_builtins(structs)
     
     async def _check_circular_dependency(self, agent_id: UUID, depends_on_agent_id: UUID) -> bool:
         """Check for circular dependencies."""
         if agent_id == depends_on_agent_id:
             return True
         
-        # Get dependencies of the target agent
-        target_dependencies = await self.dependency_repo.get_by_agent(depends_on_agent_id)
-        for dep in target_dependencies:
-            if dep.depends_on_agent_id == agent_id:
-                return True
-            # Recursive check
-            if await self._check_circular_dependency(agent_id, dep.depends_on_agent_id):
-                return True
-        
-        return False
+        return agent_id in await self.dependency_repo.reachable_from(depends_on_agent_id)
 
 
 class AgentExecutionService(BaseService[AgentExecution]):
@@ -215,9 +187,15 @@ class AgentExecutionService(BaseService[AgentExecution]):
         """Get multiple executions."""
         return await self.execution_repo.get_multi(skip, limit)
     
-    async def get_by_agent(self, agent_id: UUID, skip: int = 0, limit: int = 100) -> List[AgentExecution]:
+    async def get_by_agent(
+        self,
+        agent_id: UUID,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[Tuple[datetime, UUID]] = None,
+    ) -> List[AgentExecution]:
         """Get executions by agent ID."""
-        return await self.execution_repo.get_by_agent(agent_id, skip, limit)
+        return await self.execution_repo.get_by_agent(agent_id, skip, limit, cursor)
     
     async def create(self, obj_in: AgentExecutionCreate) -> AgentExecution:
         """Create new execution."""
@@ -241,57 +219,36 @@ class AgentExecutionService(BaseService[AgentExecution]):
     
     async def execute_agent(self, request: AgentExecutionRequest) -> AgentExecutionResponse:
         """Execute an agent with input data."""
-        # Create execution record
-        execution_data = AgentExecutionCreate(
-            agent_id=request.agent_id,
-            input_data=request.input_data,
-            status="running",
-        )
-        execution = await self.create(execution_data)
-        
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         try:
             # Here you would implement the actual agent execution logic
             # This is a placeholder for the agent execution
-            await asyncio.sleep(0.1)  # Simulate processing
-            
-            # Update execution with success
-            execution_time = int((time.time() - start_time) * 1000)
-            update_data = AgentExecutionUpdate(
-                output_data={"result": "Agent executed successfully"},
-                status="completed",
-                execution_time=execution_time,
-                completed_at=datetime.utcnow(),
-            )
-            execution = await self.update(execution.id, update_data)
-            
-            return AgentExecutionResponse(
-                execution_id=execution.id,
-                status=execution.status,
-                output_data=execution.output_data,
-                execution_time=execution.execution_time,
-            )
-            
+            if settings.AGENT_STUB:
+                await asyncio.sleep(0.1)  # Simulate processing
+            outcome = {"status": "completed", "output_data": {"result": "Agent executed successfully"}}
         except Exception as e:
-            # Update execution with error
-            execution_time = int((time.time() - start_time) * 1000)
-            update_data = AgentExecutionUpdate(
-                status="failed",
-                error_message=str(e),
-                execution_time=execution_time,
-                completed_at=datetime.utcnow(),
-            )
-            execution = await self.update(execution.id, update_data)
-            
-            logger.error(f"Agent execution failed: {execution.id} - {str(e)}")
-            
-            return AgentExecutionResponse(
-                execution_id=execution.id,
-                status=execution.status,
-                error_message=execution.error_message,
-                execution_time=execution.execution_time,
-            )
+            outcome = {"status": "failed", "error_message": str(e)}
+        
+        # Record the finished execution with a single INSERT
+        execution = await self.create(AgentExecutionCreate(
+            agent_id=request.agent_id,
+            input_data=request.input_data,
+            execution_time=(time.perf_counter_ns() - start_ns) // 1_000_000,
+            completed_at=datetime.now(timezone.utc),
+            **outcome,
+        ))
+        
+        if execution.status == "failed":
+            logger.error(f"Agent execution failed: {execution.id} - {execution.error_message}")
+        
+        return AgentExecutionResponse(
+            execution_id=execution.id,
+            status=execution.status,
+            output_data=execution.output_data,
+            error_message=execution.error_message,
+            execution_time=execution.execution_time,
+        )
 
 
 class AgentMemoryService(BaseService):
@@ -317,12 +274,23 @@ class AgentMemoryService(BaseService):
         """Get memory by agent ID and key."""
         return await self.memory_repo.get_by_key(agent_id, memory_key)
     
+    async def get_by_keys(self, agent_id: UUID, keys: List[str]) -> Dict[str, Any]:
+        """Get memories for several keys at once; prefer this over repeated get_by_key calls."""
+        return await self.memory_repo.get_by_keys(agent_id, keys)
+    
     async def create(self, obj_in: AgentMemoryCreate) -> Any:
         """Create new memory."""
         memory = await self.memory_repo.create(obj_in)
         logger.info(f"Created memory: {memory.memory_key} for agent {memory.agent_id}")
         return memory
     
+    async def upsert(self, obj_in: AgentMemoryCreate) -> Any:
+        """Create memory, or overwrite it if the agent already has the key."""
+        values = obj_in.model_dump(exclude={"agent_id", "memory_key"})
+        memory = await self.memory_repo.upsert(obj_in.agent_id, obj_in.memory_key, values)
+        logger.info(f"Saved memory: {memory.memory_key} for agent {memory.agent_id}")
+        return memory
+    
     async def update(self, id: UUID, obj_in: AgentMemoryUpdate) -> Optional[Any]:
         """Update memory."""
         memory = await self.memory_repo.update(id, obj_in)
@@ -337,37 +305,40 @@ class AgentMemoryService(BaseService):
             logger.info(f"Deleted memory: {id}")
         return success
     
+    async def delete_by_key(self, agent_id: UUID, memory_key: str) -> bool:
+        """Delete memory by agent ID and key."""
+        success = await self.memory_repo.delete_by_key(agent_id, memory_key)
+        if success:
+            logger.info(f"Deleted memory: {memory_key} for agent {agent_id}")
+        return success
+    
     async def set_memory(self, agent_id: UUID, memory_key: str, memory_value: Dict[str, Any], memory_type: str = "episodic", expires_at: Optional[datetime] = None) -> Any:
-        """Set memory for an agent."""
-        # Check if memory already exists
-        existing_memory = await self.get_by_key(agent_id, memory_key)
-        
-        if existing_memory:
-            # Update existing memory
-            update_data = AgentMemoryUpdate(
-                memory_value=memory_value,
-                memory_type=memory_type,
-                expires_at=expires_at,
-            )
-            return await self.update(existing_memory.id, update_data)
-        else:
-            # Create new memory
-            memory_data = AgentMemoryCreate(
-                agent_id=agent_id,
-                memory_key=memory_key,
-                memory_value=memory_value,
-                memory_type=memory_type,
-                expires_at=expires_at,
-            )
-            return await self.create(memory_data)
+        """Set memory for an agent in a single upsert."""
+        memory = await self.memory_repo.upsert(agent_id, memory_key, {
+            "memory_value": memory_value,
+            "memory_type": memory_type,
+            "expires_at": expires_at,
+        })
+        logger.info(f"Saved memory: {memory.memory_key} for agent {memory.agent_id}")
+        return memory
     
     async def get_memory(self, agent_id: UUID, memory_key: str) -> Optional[Dict[str, Any]]:
         """Get memory value for an agent."""
+        # Expired rows are filtered out by the lookup and purged in bulk
         memory = await self.get_by_key(agent_id, memory_key)
         if memory:
-            # Check if memory has expired
-            if memory.expires_at and memory.expires_at < datetime.utcnow():
-                await self.delete(memory.id)
-                return None
             return memory.memory_value
         return None
+
+
+async def purge_expired_memories(interval: int) -> None:
+    """Delete expired agent memories every interval seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with db_ctx() as db:
+                purged = await AgentMemoryRepository(db).purge_expired()
+            if purged:
+                logger.info(f"Purged {purged} expired memories")
+        except Exception as e:
+            logger.error(f"Memory purge failed: {str(e)}")
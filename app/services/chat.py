@@ -1,17 +1,21 @@
 """
 Chat service with LangGraph workflow.
 """
-from typing import TypedDict, List, Optional
-from openai import OpenAI
+from typing import TypedDict, List, Optional, Set
+from dataclasses import asdict, dataclass, replace
+from openai import AsyncOpenAI
+import asyncio
 import uuid
-import json
+import orjson
+import re
 from datetime import datetime
 
 from app.core.config import settings
 from app.core.logging import logger
+from app.core.ratelimit import RateLimiter
 from app.repositories.chat import ChatRepository
+from app.schemas.customer_session import coerce_messages
 from app.services.workflow import WorkflowService
-import copy
 
 class ProductInfo(TypedDict):
     product: str
@@ -24,352 +28,279 @@ class ExtractedData(TypedDict):
     status: str
 
 
-class CustomerSession(TypedDict):
+@dataclass(slots=True)
+class CustomerSession:
+    """Per-turn chat state carried through ChatService."""
     message: str
     thread_id: str
     customer_id: str
-    extracted_data: Optional[ExtractedData]
-    is_complete: bool
-    customer_session_id: int
+    extracted_data: Optional[ExtractedData] = None
+    is_complete: bool = False
+    customer_session_id: Optional[int] = None
+    response: str = ""
 
 
-class ChatService:
-    """Service for handling chat workflows with LangGraph."""
-    
-    def __init__(self, chat_repository: ChatRepository = None):
-        # Initialize OpenAI client
-        api_key = settings.OPENAI_API_KEY or "your-openai-api-key"
-        self.openai_client = OpenAI(api_key=api_key)
-        self.customer_assistant_id = self._create_assistant()
-        
-        # Initialize chat repository
-        self.chat_repository = chat_repository
-        
-        # Initialize workflow service
-        self.workflow_service = WorkflowService()
-    
-    def _create_assistant(self) -> str:
-        """Create OpenAI Assistant for extracting product information"""
-        try:
-            assistant_name = f"Product Information Extractor"
-            
-            assistant = self.openai_client.beta.assistants.create(
-                name=assistant_name,
-                instructions="""You are a helpful assistant that extracts product information from customer messages. 
+# Running completion workflows; referenced here so they aren't garbage collected
+_workflow_tasks: Set[asyncio.Task] = set()
+
+# Opening messages with no quantity, product or country can't complete an order.
+# Any word outside the filler set may name a product or country, so those go to the model.
+_QUANTITY_HINT = re.compile(
+    r"\d|\b(?:an?|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|"
+    r"twenty|thirty|forty|fifty|hundred|thousand|dozen|couple|pair|few|several)\b",
+    re.IGNORECASE,
+)
+_WORD = re.compile(r"[a-z']+", re.IGNORECASE)
+_FILLER_WORDS = frozenset({
+    "hi", "hello", "hey", "hiya", "good", "morning", "afternoon", "evening", "there",
+    "i", "i'd", "i'm", "we", "we'd", "me", "us", "my", "our", "you", "your",
+    "want", "wanna", "need", "like", "would", "could", "can", "please", "to", "do",
+    "make", "place", "order", "buy", "purchase", "get", "some", "something", "stuff",
+    "things", "help", "with", "the", "and", "for", "is", "it", "this", "thanks", "thank",
+})
+_FAST_FOLLOWUP_REPLY = "Happy to help! Which products would you like, how many of each, and which country should they come from?"
+_fast_followup_stats = {"checked": 0, "hits": 0}
+
+
+def _needs_followup_fast(message: str) -> Optional[str]:
+    """Canned follow-up for a message that names no quantity, product or country, else None."""
+    _fast_followup_stats["checked"] += 1
+    if _QUANTITY_HINT.search(message):
+        return None
+    if any(word.lower() not in _FILLER_WORDS for word in _WORD.findall(message)):
+        return None
+    _fast_followup_stats["hits"] += 1
+    return _FAST_FOLLOWUP_REPLY
+
+
+# Order extraction prompt and response schema, built once at import
+_EXTRACTION_MODEL = "gpt-4o-mini"
+_EXTRACTION_INSTRUCTIONS = """You are a helpful assistant that extracts product information from customer messages. 
                     Customers may mention one or multiple products in a single message, sometimes with incomplete details. 
                     Your tone should be natural, polite, and conversational. Avoid being overly formal, robotic, or using emojis. 
                     Keep responses short, clear, and friendly.  
 
                     Your goals:
-                    1. Extract the following for each product mentioned in the customer's message:
+                    1. Extract the following for each product mentioned in the conversation:
                         - product name (e.g., "apples", "laptops", "phones")
                         - country of origin (e.g., "Kenya", "China", "USA")  
                         - quantity (the number requested)
 
-                    2. CRITICAL: When the customer provides complete information for ALL mentioned products (product name, country, AND quantity), you MUST call the save_final_order tool immediately. This is the ONLY way to complete the order.
+                    2. CRITICAL: When the customer has provided complete information for ALL mentioned products (product name, country, AND quantity), set status to "complete" and list every product in items. This is the ONLY way to complete the order.
 
-                    3. If any detail (product, country, or quantity) is missing for one or more products, ask follow-up questions in a conversational way.  
+                    3. If any detail (product, country, or quantity) is missing for one or more products, set status to "incomplete", leave items empty and ask follow-up questions in reply in a conversational way.  
                         Examples:
                         - "I need laptops and phones from China" → "Got it! How many laptops and how many phones would you like from China?"  
                         - "I want to buy 5 laptops" → "Great! Could you let me know which country you'd like the laptops to come from?"  
 
-                    4. Always be friendly and helpful in your responses. Never mention tools or technical details to the user.
+                    4. reply is sent to the customer as is. Always be friendly and helpful in it. Never mention statuses or technical details to the user.
 
-                    IMPORTANT: You must call the save_final_order tool when you have all three pieces of information (product, country, quantity) for every product the customer wants to order.""",
-                model="gpt-4o-mini",
-                tools=[{
-                    "type": "function",
-                    "function": {
-                        "name": "save_final_order",
-                        "description": "MANDATORY: Call this function immediately when you have complete information (product name, country, and quantity) for ALL products the customer wants to order. This function MUST be called to complete the order. Do not respond to the user without calling this function when you have all required information.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "items": {
-                                    "type": "array",
-                                    "description": "The list of ordered items with product, country, and quantity.",
-                                    "items": {
-                                        "type": "object",
-                                        "properties": {
-                                            "product": {"type": "string", "description": "The product name"},
-                                            "country": {"type": "string", "description": "The country of origin"},
-                                            "quantity": {"type": "number", "description": "The quantity requested"},
-                                        },
-                                        "required": ["product", "country", "quantity"],
-                                    },
-                                },
-                            },
-                            "required": ["items"],
+                    IMPORTANT: You must set status to "complete" when you have all three pieces of information (product, country, quantity) for every product the customer wants to order."""
+_ORDER_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "order",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "status": {"type": "string", "enum": ["complete", "incomplete"]},
+                "reply": {"type": "string", "description": "The message to send to the customer"},
+                "items": {
+                    "type": "array",
+                    "description": "The list of ordered items with product, country, and quantity.",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "product": {"type": "string", "description": "The product name"},
+                            "country": {"type": "string", "description": "The country of origin"},
+                            "quantity": {"type": "number", "description": "The quantity requested"},
                         },
+                        "required": ["product", "country", "quantity"],
+                        "additionalProperties": False,
                     },
-                }]
-            )
-            logger.info(f"Created OpenAI assistant: {assistant.id}")
-            return assistant.id
-        except Exception as e:
-            logger.error(f"Error creating assistant: {e}")
-            return None
+                },
+            },
+            "required": ["status", "reply", "items"],
+            "additionalProperties": False,
+        },
+    },
+}
+_ERROR_REPLY = "I apologize, but I'm having trouble processing your message right now. Please try again."
+_COMPLETE_REPLY = "Perfect! I have all the information I need. We'll get back to you shortly with more details and pricing information."
+
+# Completions are gated client-side to stay under the account's OpenAI limits
+_OPENAI_SEMAPHORE = asyncio.Semaphore(settings.OPENAI_MAX_CONCURRENCY)
+_openai_rate_limiter = RateLimiter(settings.OPENAI_RPM, settings.OPENAI_TPM)
+# Rough prompt size (~4 characters per token) without the conversation
+_PROMPT_BASE_TOKENS = (len(_EXTRACTION_INSTRUCTIONS) + len(orjson.dumps(_ORDER_RESPONSE_FORMAT))) // 4
+
+
+class ChatService:
+    """Service for handling chat workflows with LangGraph."""
     
-    def _parse_messages(self, messages_data):
-        """Parse JSONB messages column - handles both string and object formats."""
-        if messages_data:
-            if isinstance(messages_data, str):
-                return json.loads(messages_data)
-            else:
-                return messages_data
-        else:
-            return []
+    def __init__(self, chat_repository: ChatRepository = None, openai_client: Optional[AsyncOpenAI] = None):
+        # Initialize OpenAI client (shared app client when provided)
+        if openai_client is None:
+            api_key = settings.OPENAI_API_KEY or "your-openai-api-key"
+            openai_client = AsyncOpenAI(api_key=api_key)
+        self.openai_client = openai_client
+        
+        # Initialize chat repository
+        self.chat_repository = chat_repository
+        
+        # Initialize workflow service
+        self.workflow_service = WorkflowService()
     
-    def _extract_with_assistant(self, message: str, thread_id: str) -> tuple[dict, str]:
-        """Extract information using OpenAI Assistant. Returns (extracted_data, response_text)"""
+    async def _extract_order(self, message: str, history: List[dict]) -> tuple[dict, str]:
+        """Extract information with one structured-output completion. Returns (extracted_data, response_text)"""
         try:
-            # Use OpenAI thread from socket
-            openai_thread_id = thread_id
-            logger.info(f"Processing message with assistant {self.customer_assistant_id}: {message}")
-            
-            # Add message to thread
-            self.openai_client.beta.threads.messages.create(
-                thread_id=openai_thread_id,
-                role="user",
-                content=message
-            )
-            
-            # Run the assistant
-            run = self.openai_client.beta.threads.runs.create(
-                thread_id=openai_thread_id,
-                assistant_id=self.customer_assistant_id
-            )
-            
-            # Wait for completion
-            while run.status in ['queued', 'in_progress', 'cancelling']:
-                run = self.openai_client.beta.threads.runs.retrieve(
-                    thread_id=openai_thread_id,
-                    run_id=run.id
+            logger.info(f"Processing message with {_EXTRACTION_MODEL}: {message}")
+            messages = [
+                {"role": "system", "content": _EXTRACTION_INSTRUCTIONS},
+                *({"role": m.get("role"), "content": m.get("content")} for m in history),
+                {"role": "user", "content": message},
+            ]
+            tokens = _PROMPT_BASE_TOKENS + sum(len(m["content"] or "") for m in messages[1:]) // 4
+            await _openai_rate_limiter.acquire(tokens)
+            async with _OPENAI_SEMAPHORE:
+                completion = await self.openai_client.chat.completions.create(
+                    model=_EXTRACTION_MODEL,
+                    messages=messages,
+                    response_format=_ORDER_RESPONSE_FORMAT,
                 )
             
-            logger.info(f"Run status after completion: {run.status}")
+            reply = completion.choices[0].message
+            if not reply.content:
+                logger.error(f"Model refused to answer: {reply.refusal}")
+                return None, _ERROR_REPLY
+            order = orjson.loads(reply.content)
+            response_text = order.get("reply") or ""
+            items = order.get("items") or []
             
-            # Handle tool calls when status is 'requires_action'
-            if run.status == 'requires_action':
-                logger.info("Tool call detected, processing...")
-                # Submit tool outputs to continue the run
-                tool_outputs = []
-                for tool_call in run.required_action.submit_tool_outputs.tool_calls:
-                    if tool_call.function.name == 'save_final_order':
-                        # Parse the tool call arguments
-                        try:
-                            tool_args = json.loads(tool_call.function.arguments)
-                            items = tool_args.get('items', [])
-                            
-                            # Convert to the expected format
-                            extracted_data = {
-                                "products": items,
-                                "status": "complete"
-                            }
-                            logger.info(f"Tool call processed successfully with {len(items)} items")
-                            
-                            # Submit empty tool output (we don't need to return anything to the assistant)
-                            tool_outputs.append({
-                                "tool_call_id": tool_call.id,
-                                "output": "success"
-                            })
-                            
-                            # Continue the run
-                            run = self.openai_client.beta.threads.runs.submit_tool_outputs(
-                                thread_id=openai_thread_id,
-                                run_id=run.id,
-                                tool_outputs=tool_outputs
-                            )
-                            
-                            # Wait for completion after submitting tool outputs
-                            while run.status in ['queued', 'in_progress', 'cancelling']:
-                                run = self.openai_client.beta.threads.runs.retrieve(
-                                    thread_id=openai_thread_id,
-                                    run_id=run.id
-                                )
-                            
-                            # Get the final response after tool execution
-                            if run.status == 'completed':
-                                messages = self.openai_client.beta.threads.messages.list(
-                                    thread_id=openai_thread_id
-                                )
-                                
-                                if messages.data:
-                                    message_content = messages.data[0].content
-                                    response_text = ""
-                                    
-                                    # Look for text response
-                                    for content in message_content:
-                                        if hasattr(content, 'text') and content.text:
-                                            response_text = content.text.value
-                                            break
-                                    
-                                    # If no text response found, use a default
-                                    if not response_text:
-                                        response_text = "Perfect! I have all the information I need. We'll get back to you shortly with more details and pricing information."
-                                    
-                                    return extracted_data, response_text
-                            
-                        except json.JSONDecodeError as e:
-                            logger.error(f"Error parsing tool call arguments: {e}")
-                            return None, "I apologize, but I'm having trouble processing your message right now. Please try again."
-            
-            elif run.status == 'completed':
-                # Get the response
-                messages = self.openai_client.beta.threads.messages.list(
-                    thread_id=openai_thread_id
-                )
-                
-                if messages.data:
-                    message_content = messages.data[0].content
-                    
-                    # Check if there's a tool call
-                    tool_call_found = False
-                    response_text = ""
-                    print('message_content!!', message_content)
-                    
-                    for content in message_content:
-                        # Check for tool calls
-                        if hasattr(content, 'tool_calls') and content.tool_calls:
-                            tool_call_found = True
-                            tool_call = content.tool_calls[0]
-                            if tool_call.function.name == 'save_final_order':
-                                try:
-                                    # Parse the tool call arguments
-                                    tool_args = json.loads(tool_call.function.arguments)
-                                    items = tool_args.get('items', [])
-                                    
-                                    # Convert to the expected format
-                                    extracted_data = {
-                                        "products": items,
-                                        "status": "complete"
-                                    }
-                                    
-                                    # Look for text response in other content blocks
-                                    for other_content in message_content:
-                                        if hasattr(other_content, 'text') and other_content.text:
-                                            response_text = other_content.text.value
-                                            break
-                                    
-                                    # If no text response found, use a default
-                                    if not response_text:
-                                        response_text = "Perfect! I have all the information I need. We'll get back to you shortly with more details and pricing information."
-                                    
-                                    return extracted_data, response_text
-                                    
-                                except json.JSONDecodeError as e:
-                                    logger.error(f"Error parsing tool call arguments: {e}")
-                                    return None, "I apologize, but I'm having trouble processing your message right now. Please try again."
-                        
-                        # Check for text content
-                        elif hasattr(content, 'text') and content.text:
-                            response_text = content.text.value
-                    
-                    # If no tool call was found, return the text response
-                    if not tool_call_found and response_text:
-                        return None, response_text
-            
-            return None, "I apologize, but I'm having trouble processing your message right now. Please try again."
+            if order.get("status") == "complete" and items:
+                logger.info(f"Order extracted successfully with {len(items)} items")
+                # Convert to the expected format
+                extracted_data = {
+                    "products": items,
+                    "status": "complete"
+                }
+                return extracted_data, response_text or _COMPLETE_REPLY
             
+            return None, response_text or _ERROR_REPLY
+        
+        except orjson.JSONDecodeError as e:
+            logger.error(f"Error parsing order response: {e}")
+            return None, _ERROR_REPLY
         except Exception as e:
-            logger.error(f"Error using assistant: {e}")
-            return None, "I apologize, but I'm having trouble processing your message right now. Please try again."
+            logger.error(f"Error extracting order: {e}")
+            return None, _ERROR_REPLY
     
-    async def _get_model_response(self, session_info: CustomerSession) -> None:
+    async def _get_model_response(self, session_info: CustomerSession, session_task: asyncio.Task, is_initial: bool = False) -> CustomerSession:
         """Process message directly without workflow."""
-        local_session_info = copy.deepcopy(session_info)
-        message = local_session_info["message"]
-        thread_id = local_session_info["thread_id"]
+        local_session_info = replace(session_info)
+        message = local_session_info.message
+        thread_id = local_session_info.thread_id
+        session = None
         
         try:
-            # 1. Save User message to DB
-            if self.chat_repository:
-                session = await self.chat_repository.get_customer_session(thread_id, int(local_session_info["customer_id"]))
-                local_session_info["customer_session_id"] = int(session.id)
-                if session:
-                    current_messages = self._parse_messages(session.messages)
-                    current_messages.append({
-                        "role": "user",
-                        "content": message,
-                    })
-                    await self.chat_repository.insert_message(session.id, current_messages)
-            
-            # Use OpenAI Assistant
-            extracted_data, response_text = self._extract_with_assistant(message, thread_id)
+            # Ask the model unless an opening message obviously needs a follow-up question
+            followup = _needs_followup_fast(message) if is_initial and settings.CHAT_FAST_FOLLOWUP else None
+            if followup:
+                logger.info(
+                    f"Fast follow-up for thread {thread_id} "
+                    f"({_fast_followup_stats['hits']}/{_fast_followup_stats['checked']} opening messages)"
+                )
+                extracted_data, response_text = None, followup
+            else:
+                # The conversation so far lives in the session; a new session has none,
+                # so its insert overlaps the model call
+                history = []
+                if not is_initial:
+                    session = await session_task
+                    history = coerce_messages(session.messages) if session else []
+                extracted_data, response_text = await self._extract_order(message, history)
+            session = session or await session_task
+            if session:
+                local_session_info.customer_session_id = int(session.id)
             logger.info(f"Assistant response: {response_text[:100]}...")
             
-            if extracted_data and extracted_data.get("status") == "complete":
-                # All information is available
-                local_session_info["extracted_data"] = extracted_data
-                local_session_info["response"] = response_text
-                local_session_info["is_complete"] = True
-                
-                # Save ASSISTANT message and product requests
-                await self._save_message_and_product_requests(local_session_info, session, role="assistant")
-            else:
-                # Assistant is asking for more information
-                local_session_info["response"] = response_text
-                local_session_info["extracted_data"] = extracted_data
-                local_session_info["is_complete"] = False
-                
-                # Save ASSISTANT message
-                await self._save_message(local_session_info, session, role="assistant")
-        
+            local_session_info.response = response_text
+            local_session_info.extracted_data = extracted_data
+            # Complete once all information is available, otherwise the assistant is asking for more
+            local_session_info.is_complete = bool(extracted_data and extracted_data.get("status") == "complete")
+            
+            # Save USER and ASSISTANT messages (and product requests) together
+            await self._save_turn(local_session_info, session)
                 
         except Exception as e:
             logger.error(f"Error processing message: {e}")
-            local_session_info["response"] = "I apologize, but I'm having trouble processing your message right now. Please try again."
-            local_session_info["extracted_data"] = None
-            local_session_info["is_complete"] = False
+            local_session_info.response = _ERROR_REPLY
+            local_session_info.extracted_data = None
+            local_session_info.is_complete = False
             
-            # Save ASSISTANT error message to DB
-            if self.chat_repository:
-                session = await self.chat_repository.get_customer_session(thread_id, int(local_session_info["customer_id"]))
-                if session:
-                    await self._save_message(local_session_info, session, role="assistant")
+            # Save USER and ASSISTANT error messages to DB
+            session = session or await session_task
+            await self._save_turn(local_session_info, session)
         return local_session_info
     
-    async def _save_message_and_product_requests(self, session_info: CustomerSession, session, role: str = "assistant") -> None:
-        """Save message and product requests in db."""
-        if self.chat_repository:
-            session_status = 2 if session_info["is_complete"] else 1
-            current_messages = self._parse_messages(session.messages)
-            current_messages.append({
-                "role": role,
-                "content": session_info["response"],
-            })
-            await self.chat_repository.insert_message(session.id, current_messages, session_status)
+    async def _save_turn(self, session_info: CustomerSession, session) -> None:
+        """Save the user message, the reply and any product requests in one transaction."""
+        if not (self.chat_repository and session):
+            return
+        session_status = 2 if session_info.is_complete else 1
+        async with self.chat_repository.transaction():
+            await self.chat_repository.insert_messages(session.id, [
+                {"role": "user", "content": session_info.message},
+                {"role": "assistant", "content": session_info.response},
+            ], session_status, commit=False)
             
             # Insert products into product_requests table
-            extracted_data = session_info["extracted_data"]
+            extracted_data = session_info.extracted_data
             if extracted_data and extracted_data.get("status") == "complete":
                 products = extracted_data.get("products", [])
                 if products:
                     try:
-                        product_requests_data = []
-                        for product in products:
-                            product_request_data = {
+                        product_requests_data = [
+                            {
                                 "customer_session_id": session.id,
                                 "product_name": product.get("product"),
                                 "quantity": product.get("quantity", 0),
                                 "country": product.get("country")
                             }
-                            product_requests_data.append(product_request_data)
+                            for product in products
+                        ]
                         logger.info(f'product_data: {product_requests_data}')
-                        created_requests = await self.chat_repository.create_multiple_product_requests(product_requests_data)
+                        # Savepoint, so a bad product row doesn't lose the messages
+                        async with self.chat_repository.db.begin_nested():
+                            created_requests = await self.chat_repository.create_multiple_product_requests(product_requests_data, commit=False)
                         logger.info(f"Inserted {len(created_requests)} product requests for session {session.id}")
                     except Exception as e:
+                        # Keep the conversation going
                         logger.error(f"Error inserting product requests: {e}")
     
-    async def _save_message(self, session_info: CustomerSession, session, role: str = "assistant") -> None:
-        """Save message in db."""
-        if self.chat_repository:
-            current_messages = self._parse_messages(session.messages)
-            current_messages.append({
-                "role": role,
-                "content": session_info["response"],
-            })
-            await self.chat_repository.insert_message(session.id, current_messages)
+    async def _load_session(self, thread_id: str, customer_id: str = None, is_initial: bool = False):
+        """Insert the session for an initial message, otherwise fetch it; None if unavailable."""
+        if not self.chat_repository:
+            return None
+        try:
+            customer_id_int = int(customer_id) if customer_id else None
+            if is_initial:
+                session = await self.chat_repository.insert_session(
+                    session_status=1,
+                    thread_id=thread_id,
+                    customer_id=customer_id_int
+                )
+                logger.info(f"Inserted session: {session.id}")
+                return session
+            session = await self.chat_repository.get_customer_session(thread_id, customer_id_int)
+            # End the read transaction so no connection is held across the model call
+            await self.chat_repository.db.commit()
+            return session
+        except Exception as e:
+            await self.chat_repository.db.rollback()
+            logger.error(f"Error loading session: {e}")
+            return None
     
     async def process_customer_message(self, message: str, thread_id: str = None, customer_id: str = None, is_initial: bool = False) -> dict:
         """Process a customer message directly, only invoke workflow when complete."""
@@ -379,53 +310,45 @@ class ChatService:
             message=message,
             thread_id=thread_id,
             customer_id=customer_id,
-            extracted_data=None,
-            is_complete=False
         )
         
-        # 2. Insert new session in DB
-        if is_initial and self.chat_repository:
-            try:
-                result = await self.chat_repository.insert_session(
-                    session_status=1,
-                    thread_id=thread_id,
-                    customer_id=int(customer_id) if customer_id else None
-                )
-                logger.info(f"Inserted session: {result.id}")
-            except Exception as e:
-                logger.error(f"Error inserting session: {e}")
+        # 2. Insert new session in DB, or load the existing one
+        session_task = asyncio.create_task(self._load_session(thread_id, customer_id, is_initial))
         
         # 3. Get Model Response
-        session_response = await self._get_model_response(customer_session_info)
+        session_response = await self._get_model_response(customer_session_info, session_task, is_initial)
         
         # 4. Check if conversation is complete [ Products Data Extracted ]
-        if session_response["is_complete"]:
-            self.workflow_service.trigger_workflow(session_response)
+        # Post-processing runs in the background so the reply isn't held up
+        if session_response.is_complete:
+            task = asyncio.create_task(self.workflow_service.trigger_workflow_async(asdict(session_response)))
+            _workflow_tasks.add(task)
+            task.add_done_callback(_workflow_tasks.discard)
         
-        logger.info(f"Processed message for thread {thread_id}: {session_response['response'][:100]}...")
+        logger.info(f"Processed message for thread {thread_id}: {session_response.response[:100]}...")
         
         return {
-            "message": session_response["message"],
-            "thread_id": session_response["thread_id"],
-            "customer_id": session_response["customer_id"],
-            "extracted_data": session_response["extracted_data"],
-            "response": session_response["response"],
-            "is_complete": session_response["is_complete"]
+            "message": session_response.message,
+            "thread_id": session_response.thread_id,
+            "customer_id": session_response.customer_id,
+            "extracted_data": session_response.extracted_data,
+            "response": session_response.response,
+            "is_complete": session_response.is_complete
         }
 
-    def create_openai_thread(self) -> str:
-        """Create a new one for the session"""        
-        openai_thread_id = self.openai_client.beta.threads.create()
-        logger.info(f"Created OpenAI thread: {openai_thread_id.id}")
-        return openai_thread_id.id
+    def new_thread_id(self) -> str:
+        """Create a new conversation id for the session"""
+        thread_id = f"thread_{uuid.uuid4().hex}"
+        logger.info(f"Created thread: {thread_id}")
+        return thread_id
 
     # GET APIS
-    async def get_all_sessions(self, customer_id: str = None):
+    async def get_all_sessions(self, customer_id: str = None, limit: int = 100, cursor: Optional[tuple] = None):
         """Get customer sessions with optional filtering by customer_id and pagination."""
         if customer_id:
             try:
                 customer_id_int = int(customer_id)
-                return await self.chat_repository.get_by_customer_id(customer_id_int)
+                return await self.chat_repository.get_by_customer_id(customer_id_int, limit, cursor)
             except ValueError:
                 return []
     
@@ -2,6 +2,8 @@
 Workflow service for handling LangGraph workflows.
 """
 from typing import TypedDict, List
+from functools import lru_cache
+import asyncio
 from langgraph.graph import StateGraph, END
 from app.core.logging import logger
 
@@ -23,15 +25,16 @@ class WorkflowService:
     """Service for handling LangGraph workflows."""
     
     def __init__(self):
-        self.workflow = self._build_workflow()
+        self.workflow = _compiled_workflow()
     
-    def _build_workflow(self) -> StateGraph:
+    @staticmethod
+    def _build_workflow() -> StateGraph:
         """Build the LangGraph workflow for completion handling only."""
         workflow = StateGraph(ChatbotState)
         
         # Add completion-specific nodes
-        workflow.add_node("handle_scraping", self._handle_scraping)
-        workflow.add_node("searching", self._searching)
+        workflow.add_node("handle_scraping", WorkflowService._handle_scraping)
+        workflow.add_node("searching", WorkflowService._searching)
         
         # Set entry point
         workflow.set_entry_point("handle_scraping")
@@ -42,41 +45,64 @@ class WorkflowService:
         
         return workflow.compile()
     
-    def _handle_scraping(self, state: ChatbotState) -> ChatbotState:
+    @staticmethod
+    async def _handle_scraping(state: ChatbotState) -> ChatbotState:
         """Scraping Node:Handle Scraping Logic for the products requests."""
         try:
             thread_id = state["thread_id"]
             customer_session_id = state["customer_session_id"]
             logger.info(f"Scraping for thread_id={thread_id} and customer_session_id={customer_session_id}")
+            # Products are independent, so scrape them concurrently
+            await asyncio.gather(*(WorkflowService._scrape_one(p) for p in state.get("customer_product_requests") or []))
         except Exception as e:
             logger.error(f"Error in update_final_status: {e}")
         return state
 
-    def _searching(self, state: ChatbotState) -> ChatbotState:
+    @staticmethod
+    async def _scrape_one(product: ProductInfo) -> None:
+        """Scrape a single product request."""
+        logger.debug(f"Scraping product={product.get('product')} country={product.get('country')}")
+
+    @staticmethod
+    async def _searching(state: ChatbotState) -> ChatbotState:
         """Post-process node: Vector DB Searching"""
         try:
             logger.info(f"Searching node: conversation completed. Products Requests::={state.get('customer_product_requests')}")
+            await asyncio.gather(*(WorkflowService._search_one(p) for p in state.get("customer_product_requests") or []))
         except Exception as e:
             logger.error(f"Error in searching: {e}")
         return state
+
+    @staticmethod
+    async def _search_one(product: ProductInfo) -> None:
+        """Vector DB search for a single product request."""
+        logger.debug(f"Searching product={product.get('product')} country={product.get('country')}")
+        
+    @staticmethod
+    def _initial_state(session_response: dict) -> ChatbotState:
+        """Workflow input built from a completed session response."""
+        return ChatbotState(
+            customer_product_requests=session_response.get('extracted_data').get('products'),
+            thread_id=session_response.get('thread_id'),
+            customer_id=session_response.get('customer_id'),
+            customer_session_id=session_response.get('customer_session_id')
+        )
         
-    def trigger_workflow(self, session_response: dict) -> None:
-        """Trigger workflow when customer conversation is complete."""
+    async def trigger_workflow_async(self, session_response: dict) -> None:
+        """Run the completion workflow on the event loop, e.g. as a background task."""
         try:
-            initial_state = ChatbotState(
-                customer_product_requests=session_response.get('extracted_data').get('products'),
-                thread_id=session_response.get('thread_id'),
-                customer_id=session_response.get('customer_id'),
-                customer_session_id=session_response.get('customer_session_id')
-            )
-            
-            self.workflow.invoke(initial_state)
+            await self.workflow.ainvoke(self._initial_state(session_response))
             logger.info(f"Completion workflow executed for thread_id={session_response.get('thread_id')}")
             
         except Exception as e:
             logger.error(f"Error in completion workflow: {e}")
 
 
+@lru_cache(maxsize=1)
+def _compiled_workflow():
+    """Compile the completion workflow once per process and share it."""
+    return WorkflowService._build_workflow()
+
 
 ##Workflow gets triggered only when customer conversation is complete.
 ##Entry Node: Scraping
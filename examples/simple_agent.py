@@ -2,8 +2,18 @@
 Example of a simple AI agent implementation.
 """
 from typing import Dict, Any
+import operator
 from app.core.base import AgentBase
 
+# Calculator operations, looked up instead of rebuilt on every call
+_OPERATIONS = {
+    "add": operator.add,
+    "subtract": operator.sub,
+    "multiply": operator.mul,
+    "divide": operator.truediv,
+    "power": operator.pow,
+}
+
 
 class SimpleTextProcessor(AgentBase):
     """A simple text processing agent."""
@@ -22,8 +32,8 @@ class SimpleTextProcessor(AgentBase):
         if not text:
             raise ValueError("No text provided")
         
-        # Simple text processing
-        processed_text = text.upper().strip()
+        # Simple text processing; strip first so upper() copies less
+        processed_text = text.strip().upper()
         word_count = len(processed_text.split())
         
         return {
@@ -78,18 +88,13 @@ class MathCalculator(AgentBase):
     
     def _calculate(self, operation: str, a: float, b: float) -> float:
         """Perform the mathematical operation."""
-        operations = {
-            "add": lambda x, y: x + y,
-            "subtract": lambda x, y: x - y,
-            "multiply": lambda x, y: x * y,
-            "divide": lambda x, y: x / y if y != 0 else float('inf'),
-            "power": lambda x, y: x ** y,
-        }
-        
-        if operation not in operations:
+        op = _OPERATIONS.get(operation)
+        if op is None:
             raise ValueError(f"Unsupported operation: {operation}")
         
-        return operations[operation](a, b)
+        if operation == "divide" and b == 0:
+            return float('inf')
+        return op(a, b)
 
 
 # Example usage
@@ -10,6 +10,11 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=8000,
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
         reload=settings.DEBUG,
+        # reload supervises a single process; fan out only outside DEBUG
+        workers=1 if settings.DEBUG else settings.WEB_CONCURRENCY,
         log_level=settings.LOG_LEVEL.lower(),
     )
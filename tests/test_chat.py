@@ -0,0 +1,21 @@
+from sqlalchemy.dialects import postgresql
+
+from app.repositories.chat import _GET_CUSTOMER_SESSION
+from app.services.chat import _FAST_FOLLOWUP_REPLY, _needs_followup_fast
+
+
+def test_customer_session_lookup_matches_null_customer():
+    compiled = _GET_CUSTOMER_SESSION.compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+
+    assert "customer_sessions.customer_id IS NOT DISTINCT FROM" in sql
+    assert "customer_id = " not in sql
+
+
+def test_fast_followup_answers_bare_greeting():
+    assert _needs_followup_fast("Hi there, I need to place my order please") == _FAST_FOLLOWUP_REPLY
+
+
+def test_fast_followup_leaves_named_product_to_the_model():
+    assert _needs_followup_fast("I want laptops from China") is None
+    assert _needs_followup_fast("hello, I need laptops") is None